@@ -16,11 +16,11 @@ user_id = st.session_state.get("user_id")
 
 def load_categories():
     """Load categories"""
-    return supabase.get_categories(st.session_state.user_id)
+    return list(supabase.get_habit_catalog(st.session_state.user_id))
 
 def load_habits(selected_category):
-    """Load habits for selected category"""
-    return supabase.get_habits(st.session_state.user_id,selected_category)
+    """Load habits with their ids and tracking types for selected category"""
+    return supabase.get_habit_catalog(st.session_state.user_id).get(selected_category, {})
 
 
 # select Category and Habit
@@ -48,8 +48,8 @@ def step1_select_habit():
         st.session_state.activity_data = {
             "category": selected_cat,
             "habit": selected_habit,
-            "habit_id": int(supabase.get_habit_id(st.session_state.user_id,selected_habit)),
-            "tracking_type": st.session_state.habit_details.get(selected_habit)
+            "habit_id": st.session_state.habit_details[selected_habit]["habit_id"],
+            "tracking_type": st.session_state.habit_details[selected_habit]["tracking_type"]
         }
         st.session_state.activity_step = 2
         st.rerun()
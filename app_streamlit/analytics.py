@@ -2,20 +2,28 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-import calplot
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import altair as alt
-# wordcloud
-from wordcloud import WordCloud
-from datetime import datetime
-# sentiment analysis
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+from functools import partial
+# nltk, wordcloud and calplot are loaded on first use
+from app_streamlit.utils import lazy_resources as lr
+# streak and completion calculations
+from app_streamlit.utils.habit_metrics import (calculate_streaks, calculate_streaks_grouped, calculate_expected_logs,
+                                               calculate_average_completion, calculate_completion_rate,
+                                               filter_daily_rollup, daily_log_counts, build_log_features,
+                                               calculate_habit_stats, calculate_overview_kpis, average_rating_by_habit,
+                                               goal_achievement_by_habit)
+# cached sentiment results
+from app_streamlit.utils import sentiment_cache as sc
+from app_streamlit.utils.sentiment import preprocess_text, sentiment_label, score_notes
+# sorted, memoized filtering for the sidebars
+from app_streamlit.utils import filter_engine as fe
+# rendered calendar and word cloud images
+from app_streamlit.utils import image_cache as ic
+# word frequencies of log notes
+from app_streamlit.utils import word_index as wi
 
 
 # initialize session states
@@ -28,57 +36,6 @@ if 'view_radio' not in st.session_state:
 view_container = st.container()
 
 
-# function to calculate streaks
-def calculate_streaks(dates, freq):
-    if len(dates) == 0:
-        return 0,0
-    dates = sorted(dates)
-    longest = current = 1
-    max_streak = 1
-
-    for i in range(1, len(dates)):
-        gap = (dates[i] - dates[i-1]).days
-        if (
-            (freq == 'Daily' and gap == 1) or
-            (freq == "Weekly" and gap <= 7) or
-            (freq == "Monthly" and (dates[i].month != dates[i-1].month and gap <= 31))
-        ):
-            current += 1
-            max_streak = max(max_streak, current)
-        else:
-            current = 1
-
-    today = pd.to_datetime("today").normalize()
-    days_since_last = (today - dates[-1]).days
-    is_still_active = (
-        (freq == "Daily" and days_since_last <= 1) or
-        (freq == "Weekly" and days_since_last <=7) or
-        (freq == "Monthly" and days_since_last <= 31)
-    )
-    current_streak = current if is_still_active else 0
-    return max_streak, current_streak
-
-def calculate_streaks_grouped(df):
-    """
-    Calculate the longest and current streak across multiple habits with different frequencies.
-    Expects a DataFrame with 'habit_id', 'log_date', and 'frequency' columns.
-    """
-    overall_max_streak = 0
-    overall_current_streak = 0
-
-    # Group by habit
-    grouped = df.groupby('habit_id')
-    
-    for habit_id, group in grouped:
-        dates = sorted(pd.to_datetime(group['log_date']).dt.normalize())
-        freq = group['frequency'].iloc[0]
-        max_streak, current_streak = calculate_streaks(dates, freq)
-
-        overall_max_streak = max(overall_max_streak, max_streak)
-        overall_current_streak = max(overall_current_streak, current_streak)
-
-    return overall_max_streak, overall_current_streak
-
 def average_log_interval(log_dates):
     """Calculates the average interval between logs"""
     if len(log_dates) < 2:
@@ -88,26 +45,6 @@ def average_log_interval(log_dates):
     return sum(intervals) / len(intervals)
 
 
-def calculate_average_completion(df):
-    unique_habits = df[['habit_id', 'frequency', 'start_date']].drop_duplicates()
-    total_expected_logs = 0
-    total_actual_logs = 0
-    for index,row in unique_habits.iterrows():
-        habit_id = row['habit_id']
-        frequency = row['frequency']
-        start_date = pd.to_datetime(row['start_date'])
-        # actual logs
-        actual_logs = df[df['habit_id'] == habit_id].shape[0]
-        # calculate expected logs based on habit frequency
-        expected_logs = calculate_expected_logs(start_date, frequency)
-        total_expected_logs += expected_logs
-        total_actual_logs += actual_logs
-    if total_expected_logs > 0:
-        average_completion_rate = round((total_actual_logs/total_expected_logs) * 100,2)
-    else:
-        average_completion_rate = 0
-    return average_completion_rate
-
 def calc_goal_achievement(df):
     goal_df = df[df['tracking_type'].isin(['Duration (Minutes/hours)', 'Count (Number-based)'])]
     if goal_df.shape[0] == 0:
@@ -115,7 +52,7 @@ def calc_goal_achievement(df):
         chart = None
     else:
         # calculate achievement per activity log
-        goal_df['goal_achievement'] = ((goal_df['activity'].astype(float) / goal_df['goal'].astype('float')) * 100).clip(upper=100)
+        goal_df = goal_df.assign(goal_achievement=((goal_df['value'] / goal_df['goal'].astype('float')) * 100).clip(upper=100))
         # group by habit
         habit_achievement = (goal_df.groupby('habit_id').agg(
             average_goal_achievement = ("goal_achievement", "mean"),
@@ -127,55 +64,29 @@ def calc_goal_achievement(df):
         message = None
     return chart,message
 
-def calculate_completion_rate(df):
-    today = pd.to_datetime(datetime.now().date())
-    consistency_list = []
-    unique_habits = df[['habit_id', 'name', 'frequency', 'start_date']].drop_duplicates()
-    for index,row in unique_habits.iterrows():
-        habit_id = row['habit_id']
-        name = row['name']
-        frequency = row['frequency']
-        start_date = pd.to_datetime(row['start_date'])
-        # actual logs
-        actual_logs = df[df['habit_id'] == habit_id].shape[0]
-        # calculate expected logs based on habit frequency
-        expected_logs = calculate_expected_logs(start_date, frequency)
-        consistency_rate = "%.2f" % ((actual_logs/expected_logs) * 100)
-        consistency_list.append({
-            "Habit": name,
-            "Expected Logs": expected_logs,
-            "Actual Logs":actual_logs,
-            "Completion Rate(%)": float(consistency_rate)
-        })
-    # convert completion rate list to dataframe
-    consistency_df = pd.DataFrame(consistency_list)
-    return consistency_df
-
-def calculate_log_intervals_overtime(log_dates):
-    """Calculates the intervals between logs over time"""
-    log_dates = sorted(pd.to_datetime(log_dates))
-    intervals = []
-    for i in range(1, len(log_dates)):
-        gap = (log_dates[i] - log_dates[i-1]).days
-        intervals.append({
-            'log_date': log_dates[i],
-            'interval': gap
-        })
-    return pd.DataFrame(intervals)
-
-def calculate_expected_logs(date, frequency):
-    today = pd.to_datetime("today").normalize()
-    date = pd.to_datetime(date)
-    # if frequency is daily, expected logs is days between start date and today
-    if frequency == "Daily":
-        expected_logs = max((today - date).days + 1, 1)
-    # if frequency is weekly, expected logs is weeks between start date and today
-    elif frequency == "Weekly":
-        expected_logs = max(((today - date).days // 7)+1,1)
-    # if frequency is monthly, expected logs is months between start date and today
-    elif frequency == "Monthly":
-        expected_logs = max(((today.year - date.year) * 12 + (today.month - date.month)) + 1, 1)
-    return expected_logs
+def calculate_log_intervals_overtime(log_dates, log_counts=None):
+    """Calculates the intervals between logs over time
+    
+    With log_counts, log_dates are unique days with that many logs each. Each day after the first has a row
+    with the gap since the previous day, and days with more than one log have a row with a gap of 0.
+    The 'logs' column is the number of intervals a row stands for"""
+    log_dates = pd.to_datetime(pd.Series(log_dates))
+    if log_counts is None:
+        counts = log_dates.value_counts()
+    else:
+        counts = pd.Series(np.asarray(log_counts, dtype=int), index=log_dates.to_numpy()).groupby(level=0).sum()
+    counts = counts[counts > 0].sort_index()
+    days = counts.index
+    gaps = pd.DataFrame({
+        'log_date': days[1:],
+        'interval': (days[1:] - days[:-1]).days,
+        'logs': 1
+    })
+    # logs on the same day are 0 days apart
+    same_day = pd.DataFrame({'log_date': days, 'interval': 0, 'logs': counts.to_numpy() - 1})
+    same_day = same_day[same_day['logs'] > 0]
+    intervals = pd.concat([gaps, same_day], ignore_index=True)
+    return intervals.sort_values('log_date', kind='mergesort').reset_index(drop=True)
 
 def create_summary_table(df):
     habit = df.iloc[0]
@@ -187,13 +98,13 @@ def create_summary_table(df):
     start_date = habit['start_date']
     # goal achievement
     if tracking == "Yes/No (Completed or not)":
-        df['goal_achievement'] = np.nan
-        total_logs = df[df['activity'] == 'Yes'].shape[0]
+        goal_achievement = pd.Series(np.nan, index=df.index)
+        total_logs = int(df['completed'].sum())
     else:
-        df['goal_achievement'] = ((df['activity'].astype(float) / float(goal)) * 100).clip(upper=100)
+        goal_achievement = ((df['value'] / float(goal)) * 100).clip(upper=100)
         total_logs = df.shape[0]
     # average goal achievement
-    avg_goal = df['goal_achievement'].mean()
+    avg_goal = goal_achievement.mean()
     # average rating
     avg_rating = df['rating'].mean()
     # first and last logs
@@ -261,10 +172,12 @@ def plot_bar_chart(df, group_col, value_col, x_title, y_title, orientation='hori
 
 def plot_line_chart(df, date_col, value_col, x_title, y_title, target_value=None, y_min=None, y_max=None, y_tick_count=None):
     """Plots a line chart with altair"""
-    df[date_col] = pd.to_datetime(df[date_col])
-    df[value_col] = df[value_col].astype(float)
+    # chart a typed copy of only the plotted columns so the caller's frame is left untouched
+    columns = list(dict.fromkeys([date_col, value_col] + ([target_value] if target_value is not None else [])))
+    data = df[columns].astype({value_col: float})
+    data[date_col] = pd.to_datetime(data[date_col])
 
-    chart = alt.Chart(df).properties(
+    chart = alt.Chart(data).properties(
         width = 700,
         height = 400
     )
@@ -293,73 +206,114 @@ def plot_line_chart(df, date_col, value_col, x_title, y_title, target_value=None
 
     return chart
 
-def plot_calplot(df, date_col, cmap='YlGn'):
-    """Plots a calendar plot"""
-    cal_data = df.groupby(date_col).size()
+def plot_calplot(df, date_col, cmap='YlGn', daily_rollup=None):
+    """Plots a calendar plot
+    
+    With a daily rollup the log counts per day are read from the rollup instead of counted from df"""
+    if daily_rollup is not None:
+        cal_data = daily_log_counts(daily_rollup)
+    else:
+        cal_data = df.groupby(date_col).size()
     cal_data.index = pd.to_datetime(cal_data.index)
+    calplot = lr.get_calplot()
     fig,ax = calplot.calplot(cal_data, cmap=cmap, figsize=(8,3), colorbar=False)
     return fig,ax
 
-def create_wordcloud(df, notes_col):
-    """Create wordcloud"""
-    notes = df[notes_col].dropna().to_list()
-    text = " ".join(notes)
-    if text.strip() == "":
+def show_figure(render, image_key=None):
+    """Show the figure returned by render and close it
+    
+    With an image_key the figure is rendered once and served from the image cache as a PNG"""
+    if image_key is None:
+        fig = render()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+    else:
+        st.image(ic.get_image(image_key, render), use_container_width=True)
+
+def image_key_for(image_key, name):
+    """Get the image cache key of one visual, None when images are not cached"""
+    return None if image_key is None else image_key + (name,)
+
+def show_calplot(df, date_col, cmap='YlGn', daily_rollup=None, image_key=None):
+    """Show the calendar plot, from the image cache when image_key is given"""
+    show_figure(lambda: plot_calplot(df, date_col, cmap, daily_rollup)[0], image_key)
+
+def plot_wordcloud(frequencies):
+    """Plots a wordcloud of word frequencies"""
+    WordCloud = lr.get_wordcloud()
+    wordcloud = WordCloud(width=800, height=400, background_color='white',colormap='viridis').generate_from_frequencies(frequencies)
+    fig,ax = plt.subplots(figsize=(6,4))
+    ax.imshow(wordcloud,interpolation='bilinear')
+    ax.axis('off')
+    return fig
+
+def get_word_frequencies(df, notes_col, user_id=None):
+    """Gets the word frequencies of the notes in df
+    
+    With a user_id, logs are added once to the user's word index, which is shared by all of the user's sessions.
+    Notes are only tokenized the first time they are seen, their word counts are kept in the word index cache db"""
+    if user_id is None or 'log_id' not in df.columns:
+        return wi.count_notes(df[notes_col])
+    index = wi.update_word_index(wi.get_user_index(user_id), df, notes_col)
+    return wi.word_frequencies(index, df)
+
+def create_wordcloud(df, notes_col, image_key=None, user_id=None):
+    """Create wordcloud, from the image cache when image_key is given
+    
+    A cached image is shown without counting any words"""
+    png = None if image_key is None else ic.get_cached_image(image_key)
+    if png is not None:
+        st.image(png, use_container_width=True)
+        return
+    frequencies = get_word_frequencies(df, notes_col, user_id)
+    if not frequencies:
         st.info("Wordcloud not available because there are not enough notes from your logs to build the visual")
     else:
-        wordcloud = WordCloud(width=800, height=400, background_color='white',colormap='viridis').generate(text)
-        fig,ax = plt.subplots(figsize=(6,4))
-        ax.imshow(wordcloud,interpolation='bilinear')
-        ax.axis('off')
-        st.pyplot(fig)
+        show_figure(partial(plot_wordcloud, frequencies), image_key)
 
 def text_preprocessor(text):
     """Preprocesses text for sentiment analysis"""
-    # tokenize text
-    tokens = word_tokenize(text.lower())
-    # remove stopwords
-    stop_words = set(stopwords.words('english'))
-    filtered_tokens = [token for token in tokens if token not in stop_words]
-    # lemmatize text
-    lemmatizer = WordNetLemmatizer()
-    lemmatized_tokens = [lemmatizer.lemmatize(token) for token in filtered_tokens]
-    # get processed text
-    processed_text = ' '.join(lemmatized_tokens)
-    return processed_text
+    load_nltk_resources()
+    return preprocess_text(text)
 
 # initialize the VADER sentiment analyzer
 @st.cache_resource
 def load_nltk_resources():
-
-    try:
-        nltk.download('punkt_tab', quiet=True)
-    except:
-        nltk.download('punkt', quiet=True)
-    resources = [
-        ('sentiment/vader_lexicon.zip', 'vader_lexicon'),
-        ('corpora/stopwords', 'stopwords'),
-        ('corpora/wordnet', 'wordnet')
-    ]
-
-    for resource_path, download_name in resources:
-        try:
-            nltk.data.find(resource_path)
-        except (LookupError, ImportError):
-            nltk.download(download_name)
-
+    """Downloads nltk resources on first use and returns the sentiment analyzer"""
+    lr.get_nltk()
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
     return SentimentIntensityAnalyzer()
-sid = load_nltk_resources()
+
 def sentiment_analyzer(text):
     """Analyzes the sentiment of a text"""
     # get sentiment scores
-    scores = sid.polarity_scores(text)['compound']
-    # criteria for sentiment classification
-    if scores >= 0.05:
-        return 'positive'
-    elif scores <= -0.05:
-        return 'negative'
-    else:
-        return 'neutral'
+    scores = load_nltk_resources().polarity_scores(text)['compound']
+    return sentiment_label(scores)
+
+def get_note_sentiments(notes):
+    """Gets the sentiment of each note, only scoring notes that are not in the sentiment cache"""
+    notes = notes.fillna('').astype(str)
+    hashes = notes.map(sc.note_hash)
+    # unique notes keyed by hash
+    unique_notes = dict(zip(hashes, notes))
+    results = sc.get_cached_sentiments(unique_notes.keys())
+    # score notes that have not been seen before in one batch
+    new_hashes = [hash_key for hash_key in unique_notes if hash_key not in results]
+    if new_hashes:
+        load_nltk_resources()
+        scored = score_notes(pd.Series([unique_notes[hash_key] for hash_key in new_hashes]))
+        new_rows = list(zip(new_hashes, scored['sentiment'], scored['compound']))
+        sc.save_sentiments(new_rows)
+        for hash_key, sentiment, compound in new_rows:
+            results[hash_key] = (sentiment, compound)
+    return hashes.map({hash_key: result[0] for hash_key, result in results.items()})
+
+def with_log_notes(df, load_notes=None):
+    """Add the log notes column to df, loading the notes only when a view needs them"""
+    if 'log_notes' in df.columns or load_notes is None:
+        return df
+    notes = load_notes()
+    return df.assign(log_notes=df['log_id'].map(notes).fillna(''))
 
 def get_sentiment_results(df, sentiment_col):
     """Gets the percentage of each sentiment"""
@@ -375,66 +329,85 @@ def get_sentiment_results(df, sentiment_col):
 
 
 
+def get_session_cache(key):
+    """Get a cache dict kept in session state"""
+    if key not in st.session_state:
+        st.session_state[key] = {}
+    return st.session_state[key]
+
+def get_log_features(merged_df):
+    """Get the merged logs with derived feature columns, computed once per data version
+
+    The returned frame and the filtered frames built from it are shared across reruns and must not be modified"""
+    cache = get_session_cache('feature_cache')
+    if cache.get('source') is not merged_df:
+        cache['source'] = merged_df
+        cache['features'] = build_log_features(merged_df)
+    return cache['features']
+
 def show_sidebar(merged_df):
+    """Show the sidebar filters and get the filtered logs with the filter selection"""
+    # sorted index of the logs, rebuilt only when the data changes
+    index = fe.get_filter_index(get_session_cache('filter_cache'), merged_df)
+    first_date, last_date = fe.date_range(index)
     with st.sidebar:
         st.title('Filters')
         if st.session_state.sub_option == "📊 Overview":
             # date filters for overview page
-            start_date = st.date_input("Start date", merged_df['log_date'].min().date())
-            end_date = st.date_input("End date", merged_df['log_date'].max().date())
+            start_date = st.date_input("Start date", first_date.date())
+            end_date = st.date_input("End date", last_date.date())
             start_date = pd.to_datetime(start_date)
             end_date = pd.to_datetime(end_date)
-            overview_df01 = merged_df[(merged_df['log_date'] >= start_date) & (merged_df['log_date'] <= end_date)]
 
             # category filters
-            categories = overview_df01['category'].unique()
+            categories = fe.filter_options(index, 'category', start_date, end_date)
             categories_with_all = ['All categories'] + sorted(categories)
             selected_category = st.selectbox("Select category", options=categories_with_all)
 
-            if selected_category == 'All categories':
-                overview_df = overview_df01.copy()
-            else:
-                overview_df = merged_df[merged_df['category'] == selected_category]
-            return overview_df
+            category = None if selected_category == 'All categories' else selected_category
+            overview_df = fe.filter_logs(index, start_date, end_date, category)
+            return overview_df, ('overview', start_date, end_date, category)
         elif st.session_state.sub_option == "📈 Activity Analytics":
             # category filters
-            analytics_categories = merged_df['category'].unique()
+            analytics_categories = fe.filter_options(index, 'category')
             analytics_selected_category = st.selectbox('Select category', options=analytics_categories)
 
-            analytics_df01 = merged_df[merged_df['category'] == analytics_selected_category]
-
             # habit filters
-            analytics_habits = analytics_df01['name'].unique()
+            analytics_habits = fe.filter_options(index, 'name', category=analytics_selected_category)
             analytics_selected_habit = st.selectbox("Select habit", options=analytics_habits)
-            analytics_df = analytics_df01[analytics_df01['name'] == analytics_selected_habit]
-            return analytics_df
+            analytics_df = fe.filter_logs(index, category=analytics_selected_category, habit=analytics_selected_habit)
+            return analytics_df, ('activity', analytics_selected_category, analytics_selected_habit)
         elif st.session_state.sub_option == "🗃️ Data":
             # data filters for data page
-            data_categories = merged_df['category'].unique()
+            data_categories = fe.filter_options(index, 'category')
             data_categories_with_all = ['All categories'] + sorted(data_categories)
             selected_data_category = st.selectbox("Select category", options=data_categories_with_all)
-            if selected_data_category == 'All categories':
-                data_df = merged_df.copy()
-            else:
-                data_df = merged_df[merged_df['category'] == selected_data_category]
+            category = None if selected_data_category == 'All categories' else selected_data_category
             # habit filters
-            data_habits = data_df['name'].unique()
+            data_habits = fe.filter_options(index, 'name', category=category)
             data_habits_with_all = ['All habits'] + sorted(data_habits)
             selected_data_habit = st.selectbox("Select habit", options=data_habits_with_all)
-            if selected_data_habit == 'All habits':
-                data_df = data_df.copy()
-            else:
-                data_df = data_df[data_df['name'] == selected_data_habit]
+            habit = None if selected_data_habit == 'All habits' else selected_data_habit
             # date filters
-            data_start_date = st.date_input("Start date", data_df['log_date'].min().date())
-            data_end_date = st.date_input("End date", data_df['log_date'].max().date())
+            data_first_date, data_last_date = fe.date_range(index, category, habit)
+            data_start_date = st.date_input("Start date", data_first_date.date())
+            data_end_date = st.date_input("End date", data_last_date.date())
             data_start_date = pd.to_datetime(data_start_date)
             data_end_date = pd.to_datetime(data_end_date)
-            data_df = data_df[(data_df['log_date'] >= data_start_date) & (data_df['log_date'] <= data_end_date)]
-            return data_df
+            data_df = fe.filter_logs(index, data_start_date, data_end_date, category, habit)
+            return data_df, ('data', data_start_date, data_end_date, category, habit)
 
-def show_visuals(df):
+def show_visuals(df, daily_rollup=None, load_notes=None, image_key=None, user_id=None):
+    """Show the visuals of the selected view
+    
+    image_key is a (user id, filter selection, data version) tuple, the calendar and word cloud are cached under it.
+    With a user_id the word cloud is counted from the user's word index."""
+    # daily log counts for the filtered habits and dates
+    rollup = filter_daily_rollup(daily_rollup, df)
     if st.session_state.sub_option == "📊 Overview":
+        # per-habit statistics for the kpis and habit charts
+        habit_stats = calculate_habit_stats(df)
+        kpis = calculate_overview_kpis(habit_stats)
         # 2 kpi column divisions
         kpi_section1, kpi_section2 = st.columns(2)
         with kpi_section1:
@@ -442,13 +415,13 @@ def show_visuals(df):
             kpi1,kpi2,kpi3 = st.columns(3)
             with kpi1:
                     # total habits
-                    st.metric(label="Total Habits", value=df['habit_id'].nunique(), border=True)
+                    st.metric(label="Total Habits", value=kpis['total_habits'], border=True)
             with kpi2:
                 # total logs
-                st.metric(label="Total Logs", value=df['log_id'].nunique(), border=True)
+                st.metric(label="Total Logs", value=kpis['total_logs'], border=True)
             with kpi3:
                 # average rating
-                st.metric(label="Average Rating", value=round(df['rating'].mean(),2), delta_color="normal", border=True)
+                st.metric(label="Average Rating", value=kpis['average_rating'], delta_color="normal", border=True)
 
         with kpi_section2:
             # columns for KPI metrics
@@ -462,23 +435,7 @@ def show_visuals(df):
                 st.metric(label="Current Streak", value=current_streak, border=True)
             with kpi6:
                 # average completion rate
-                unique_habits = df[['habit_id', 'frequency', 'start_date']].drop_duplicates()
-                total_expected_logs = 0
-                total_actual_logs = 0
-                for index,row in unique_habits.iterrows():
-                    habit_id = row['habit_id']
-                    frequency = row['frequency']
-                    start_date = pd.to_datetime(row['start_date'])
-                    # actual logs
-                    actual_logs = df[df['habit_id'] == habit_id].shape[0]
-                    # calculate expected logs based on habit frequency
-                    expected_logs = calculate_expected_logs(start_date, frequency)
-                    total_expected_logs += expected_logs
-                    total_actual_logs += actual_logs
-                if total_expected_logs > 0:
-                    average_completion_rate = round((total_actual_logs/total_expected_logs) * 100,2)
-                else:
-                    average_completion_rate = 0
+                average_completion_rate = calculate_average_completion(df)
                 st.metric(label="Average Completion Rate", value=f"{average_completion_rate}%", delta_color="normal", border=True)
 
         # create 2 columns for charts
@@ -497,7 +454,7 @@ def show_visuals(df):
             with st.container(height=500):
                 # average rating per habit visual
                 st.subheader("⭐ Average Rating by Activity")
-                habit_averages = df.groupby('name')['rating'].mean().round(2).reset_index().sort_values(by='rating', ascending=True)
+                habit_averages = average_rating_by_habit(habit_stats)
                 if len(habit_averages) <= 10:
                     chart = plot_bar_chart(habit_averages, 'name', 'rating', 'Activity', 'Average Rating')
                     st.altair_chart(chart, use_container_width=True)
@@ -519,19 +476,11 @@ def show_visuals(df):
             with st.container(height=500):
                 # goal achievement visual
                 st.subheader("🎯 Goal Achievement")
-                # filter for only tracking types that allow for goal tracking
-                goal_df = df[df['tracking_type'].isin(['Duration (Minutes/hours)', 'Count (Number-based)'])]
-                if goal_df.shape[0] == 0:
+                # only habits that allow for goal tracking have an achievement
+                habit_achievement = goal_achievement_by_habit(habit_stats)
+                if habit_achievement.shape[0] == 0:
                     st.info("This category does not have habits to be displayed for this visual")
                 else:
-                    # calculate achievement per activity log
-                    goal_df['goal_achievement'] = ((goal_df['activity'].astype(float) / goal_df['goal'].astype('float')) * 100).clip(upper=100)
-                    # group by habit
-                    habit_achievement = (goal_df.groupby('habit_id').agg(
-                        average_goal_achievement = ("goal_achievement", "mean"),
-                        total_logs = ("log_id", 'count'),
-                        habit_name = ("name", 'first')
-                    ).reset_index().sort_values(by='average_goal_achievement', ascending=True)).round(2)
                     # plot visual
                     chart = plot_bar_chart(habit_achievement, 'habit_name', 'average_goal_achievement', 'Activity', 'Goal Achievement Rate')
                     st.altair_chart(chart, use_container_width=True)
@@ -539,28 +488,28 @@ def show_visuals(df):
             with st.container(height=500):
                 # give users option to select wordcloud visual or sentiment analysis
                 st.subheader("💡 Insights from Activity Logs")
-                texts_df = df[df['log_notes'].str.strip().astype(bool)]
+                notes_df = with_log_notes(df, load_notes)
+                texts_df = notes_df[notes_df['log_notes'].str.strip().astype(bool)]
                 if len(texts_df) == 0:
                     st.info("You do not have enough log notes for this visual. Please add notes to your next logs")
                 else:
                     tab1, tab2 = st.tabs(['Highlights', 'Sentiment Analysis'])
                     with tab1:
                         # create wordcloud
-                        create_wordcloud(df, 'log_notes')
+                        create_wordcloud(notes_df, 'log_notes', image_key_for(image_key, 'wordcloud'), user_id)
                     with tab2:
                         # sentiment analysis
-                        texts_df['processed_text'] = texts_df['log_notes'].apply(text_preprocessor)
-                        texts_df['sentiment'] = texts_df['processed_text'].apply(sentiment_analyzer)
+                        texts_df = texts_df.assign(sentiment=get_note_sentiments(texts_df['log_notes']))
                         overview_sentiments = get_sentiment_results(texts_df, 'sentiment')
                         fig,ax = plt.subplots(figsize=(4,3))
                         ax.pie(overview_sentiments['Percentage'], labels=overview_sentiments['Sentiment'], autopct='%1.1f%%', startangle=90)
                         ax.axis('equal')
                         st.pyplot(fig)
+                        plt.close(fig)
 
         # log calendar visual
         st.subheader("📅 Log Calendar")
-        fig,ax = plot_calplot(df, 'log_date')
-        st.pyplot(fig, use_container_width=True)
+        show_calplot(df, 'log_date', daily_rollup=rollup, image_key=image_key_for(image_key, 'calplot'))
     elif st.session_state.sub_option == "📈 Activity Analytics":
         habit_name  = df['name'].unique()[0]
         st.metric(label='Activity', value=habit_name)
@@ -578,7 +527,7 @@ def show_visuals(df):
                 start_date = pd.to_datetime(df['start_date'].unique()[0])
                 tracking = df['tracking_type'].unique()[0]
                 if tracking == "Yes/No (Completed or not)":
-                    actual_logs = df[df['activity'] == "Yes"].shape[0]
+                    actual_logs = int(df['completed'].sum())
                 else:
                     actual_logs = df.shape[0]
                 expected_logs = calculate_expected_logs(start_date, frequency)
@@ -607,11 +556,11 @@ def show_visuals(df):
                 # context aware kpi for duration, count, or yes/no
                 if tracking == "Yes/No (Completed or not)":
                     # yes/no tracking
-                    completed = df[df['activity'] == "Yes"].shape[0]
+                    completed = int(df['completed'].sum())
                     st.metric(label="Completed", value=completed, delta_color="normal", border=True)
                 elif tracking == "Duration (Minutes/hours)":
                     # duration tracking
-                    total_duration = df['activity'].astype(int).sum()
+                    total_duration = int(df['value'].sum())
                     if total_duration > 60:
                         hours = round(total_duration / 60,2)
                         st.metric(label="Total Duration (hrs)", value=hours, delta_color="normal", border=True)
@@ -619,7 +568,7 @@ def show_visuals(df):
                         st.metric(label="Total Duration (mins)", value=total_duration, delta_color="normal", border=True)
                 elif tracking == "Count (Number-based)":
                     # count tracking
-                    total_count = df['activity'].sum()
+                    total_count = int(df['value'].sum())
                     goal_units = df['goal_units'].unique()[0]
                     st.metric(label=goal_units, value=total_count, delta_color="normal", border=True)
             with kpi6:
@@ -627,7 +576,6 @@ def show_visuals(df):
                 tracking = df['tracking_type'].unique()[0]
                 goal = df['goal'].unique()[0]
                 if tracking != "Yes/No (Completed or not)":
-                    df['goal_achievement'] = ((df['activity'].astype(float) / float(goal)) * 100).clip(upper=100)
                     goal_achievement = f"{round(df['goal_achievement'].mean(),2)}%"
                 else:
                     goal_achievement = 'N/A'
@@ -647,11 +595,6 @@ def show_visuals(df):
                 frequency = habit['frequency']
                 tracking = habit['tracking_type']
                 start_date = habit['start_date']
-                # goal achievement
-                if tracking == "Yes/No (Completed or not)":
-                    df['goal_achievement'] = np.nan
-                else:
-                    df['goal_achievement'] = ((df['activity'].astype(float) / float(goal)) * 100).clip(upper=100)
                 # average goal achievement
                 avg_goal = df['goal_achievement'].mean()
                 # average rating
@@ -699,17 +642,17 @@ def show_visuals(df):
                 st.subheader('🎯 Log vs Target')
                 if tracking != "Yes/No (Completed or not)":
                     goal = int(goal)
-                    chart = plot_line_chart(df, 'log_date', 'activity', 'Log Date', goal_units,'goal', y_min=0, y_max=goal+10, y_tick_count=5)
+                    chart = plot_line_chart(df, 'log_date', 'value', 'Log Date', goal_units,'goal', y_min=0, y_max=goal+10, y_tick_count=5)
                     st.altair_chart(chart, use_container_width=True)
                 else:
                     st.info("This visual is not available for this activity")
 
             with st.container(height=500):
                 # day of week visual
-                df['day_of_week'] = df['log_date'].dt.day_name()
                 order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                df['day_of_week'] = pd.Categorical(df['day_of_week'], categories=order, ordered=True)
-                day_counts = df['day_of_week'].value_counts().sort_index().reset_index()
+                day_of_week = pd.Categorical(rollup['log_date'].dt.day_name(), categories=order, ordered=True)
+                day_counts = rollup['log_count'].groupby(day_of_week, observed=False).sum()
+                day_counts = day_counts.rename_axis('day_of_week').reset_index(name='count')
                 st.subheader("🗓️ Activity Logs by Day of Week")
                 chart = plot_bar_chart(day_counts, 'day_of_week', 'count', 'Number of Logs', 'Day of Week', orientation='vertical')
                 st.altair_chart(chart, use_container_width=True)
@@ -726,23 +669,25 @@ def show_visuals(df):
 
             with st.container(height=500):
                 st.subheader("💡 Insights from Activity Logs")
+                notes_df = with_log_notes(df, load_notes)
                 tab1, tab2 = st.tabs(['Highlights', 'Sentiment Analysis'])
                 with tab1:
-                    create_wordcloud(df, 'log_notes')
+                    create_wordcloud(notes_df, 'log_notes', image_key_for(image_key, 'wordcloud'), user_id)
                 with tab2:
                     # sentiment analysis
-                    df['processed_text'] = df['log_notes'].apply(text_preprocessor)
-                    df['sentiment'] = df['processed_text'].apply(sentiment_analyzer)
+                    sentiments = get_note_sentiments(notes_df['log_notes'])
                     # pie chart for sentiment analysis
                     fig,ax = plt.subplots(figsize=(4,3))
-                    ax.pie(df['sentiment'].value_counts(), labels=df['sentiment'].value_counts().index, autopct='%1.1f%%', startangle=90)
+                    ax.pie(sentiments.value_counts(), labels=sentiments.value_counts().index, autopct='%1.1f%%', startangle=90)
                     ax.axis('equal')
                     st.pyplot(fig)
+                    plt.close(fig)
 
             # log intervals over time
             with st.container(height=500):
                 st.subheader("⌚ Log Intervals Over Time")
-                log_intervals = calculate_log_intervals_overtime(df['log_date'])
+                daily_counts = daily_log_counts(rollup)
+                log_intervals = calculate_log_intervals_overtime(daily_counts.index, daily_counts.to_numpy())
                 if log_intervals.shape[0] == 0:
                     st.info("This activity does not have enough logs to display this visual")
                 else:
@@ -753,12 +698,11 @@ def show_visuals(df):
 
         # log calendar visual
         st.subheader(" 📅 Log Calendar")
-        fig,ax = plot_calplot(df, 'log_date', cmap='YlGn_r')
-        st.pyplot(fig, use_container_width=True)
+        show_calplot(df, 'log_date', cmap='YlGn_r', daily_rollup=rollup, image_key=image_key_for(image_key, 'calplot'))
 
     elif st.session_state.sub_option == "🗃️ Data":
-        data = df[['log_date','name','category','activity','goal','goal_units','tracking_type','rating','log_notes']]
-        data.rename(columns={
+        data = with_log_notes(df, load_notes)[['log_date','name','category','activity','goal','goal_units','tracking_type','rating','log_notes']]
+        data = data.rename(columns={
             'log_date': 'Log Date',
             'name': 'Activity',
             'category': 'Category',
@@ -768,7 +712,7 @@ def show_visuals(df):
             'tracking_type': 'Tracking Type',
             'rating': 'Rating',
             'log_notes': 'Notes'
-        }, inplace=True)
+        })
         st.header("Your activity logs data")
         st.write(f"Showing {len(data)} records based on your filter selections.")
         st.dataframe(data, hide_index=True)
@@ -778,10 +722,14 @@ def show_visuals(df):
 
 
 
-def show_analytics(merged_df):
-    """Main function to show the analytics page"""
+def show_analytics(merged_df, daily_rollup=None, load_notes=None, user_id=None, data_version=None):
+    """Main function to show the analytics page
+    
+    load_notes returns the log notes indexed by log id when merged_df has no log_notes column.
+    With a user_id and data_version the calendar and word cloud images are cached across reruns."""
     st.radio(label="Sub", options=["📊 Overview", "📈 Activity Analytics", "🗃️ Data"], key="sub_option", label_visibility='collapsed', horizontal=True)
-    df = show_sidebar(merged_df)
-    show_visuals(df)
+    df, filters = show_sidebar(get_log_features(merged_df))
+    image_key = None if user_id is None or data_version is None else (user_id, filters, data_version)
+    show_visuals(df, daily_rollup, load_notes, image_key, user_id)
 
 
@@ -9,6 +9,8 @@ import random
 from datetime import datetime, timedelta
 
 import analytics as hp
+from app_streamlit.utils import filter_engine as fe
+from app_streamlit.utils.habit_metrics import split_activity
 
 if "demo_analytics_view" not in st.session_state:
     st.session_state.analytics_view = "📊 Overview"
@@ -206,6 +208,8 @@ for habit in habits:
 demo_data = pd.DataFrame(all_logs)
 demo_data["log_date"] = pd.to_datetime(demo_data["log_date"])
 demo_data['start_date'] = pd.to_datetime(demo_data['start_date'])
+# typed activity columns, like the generated columns of activity_logs
+demo_data['completed'], demo_data['value'] = split_activity(demo_data['activity'])
 
 demo_data = demo_data.sort_values(['habit_id', 'log_date']).reset_index(drop=True)
 
@@ -225,62 +229,53 @@ def demo_sidebar(data):
 
         st.title("Filters")
 
+        # sorted index of the demo logs, built once per session
+        index = fe.get_filter_index(hp.get_session_cache('demo_filter_cache'), data, category_col='habit_category')
+
         if st.session_state.demo_analytics_view == "📊 Overview":
             # date filters
-            start_date = st.date_input("Start Date", value=data["log_date"].min().date())
-            end_date = st.date_input("End Date", value=data["log_date"].max().date())
+            first_date, last_date = fe.date_range(index)
+            start_date = st.date_input("Start Date", value=first_date.date())
+            end_date = st.date_input("End Date", value=last_date.date())
             start_date = pd.to_datetime(start_date)
             end_date = pd.to_datetime(end_date)
-            # filter data based on date range
-            date_filtered_data = data[(data["log_date"] >= start_date) & (data["log_date"] <= end_date)]
 
             # category filters
-            categories = date_filtered_data["habit_category"].unique().tolist()
+            categories = fe.filter_options(index, "habit_category", start_date, end_date)
             categories.insert(0, "All Categories")
             selected_category = st.selectbox("Select Category", categories)
-            if selected_category != "All Categories":
-                category_filtered_data = date_filtered_data[date_filtered_data["habit_category"] == selected_category]
-            else:
-                category_filtered_data = date_filtered_data.copy()
-            return category_filtered_data
+            category = None if selected_category == "All Categories" else selected_category
+            # filter data based on date range and category
+            return fe.filter_logs(index, start_date, end_date, category)
             
         elif st.session_state.demo_analytics_view == "📈 Activity Analytics":
             # category filters
-            categories = data["habit_category"].unique().tolist()
+            categories = fe.filter_options(index, "habit_category")
             analytics_categories = st.selectbox("Select Category", categories)
-            # filter data based on selected category
-            category_filtered_data = data[data["habit_category"] == analytics_categories]
             # activity filters
-            activities = category_filtered_data["name"].unique().tolist()
+            activities = fe.filter_options(index, "name", category=analytics_categories)
             selected_activity = st.selectbox("Select Activity", activities)
-            # filter data based on selected activity
-            activity_filtered_data = category_filtered_data[category_filtered_data["name"] == selected_activity]
-            return activity_filtered_data
+            # filter data based on selected category and activity
+            return fe.filter_logs(index, category=analytics_categories, habit=selected_activity)
         elif st.session_state.demo_analytics_view == "🗃️ Data":
             # category filters
-            categories = data["habit_category"].unique().tolist()
+            categories = fe.filter_options(index, "habit_category")
             categories.insert(0, "All Categories")
             selected_category = st.selectbox("Select Category", categories)
-            if selected_category != "All Categories":
-                category_filtered_data = data[data["habit_category"] == selected_category]
-            else:
-                category_filtered_data = data.copy()
+            category = None if selected_category == "All Categories" else selected_category
             # activity filters
-            activities = category_filtered_data["name"].unique().tolist()
+            activities = fe.filter_options(index, "name", category=category)
             activities.insert(0, "All Activities")
             selected_activity = st.selectbox("Select Activity", activities)
-            if selected_activity != "All Activities":
-                activity_filtered_data = category_filtered_data[category_filtered_data["name"] == selected_activity]
-            else:
-                activity_filtered_data = category_filtered_data.copy()
+            activity = None if selected_activity == "All Activities" else selected_activity
             # date filters
-            start_date = st.date_input("Start Date", value=activity_filtered_data["log_date"].min().date())
-            end_date = st.date_input("End Date", value=activity_filtered_data["log_date"].max().date())
+            first_date, last_date = fe.date_range(index, category, activity)
+            start_date = st.date_input("Start Date", value=first_date.date())
+            end_date = st.date_input("End Date", value=last_date.date())
             start_date = pd.to_datetime(start_date)
             end_date = pd.to_datetime(end_date)
             # filter data based on date range
-            date_filtered_data = activity_filtered_data[(activity_filtered_data["log_date"] >= start_date) & (activity_filtered_data["log_date"] <= end_date)]
-            return date_filtered_data
+            return fe.filter_logs(index, start_date, end_date, category, activity)
 
 
 
@@ -379,18 +374,17 @@ def demo_main(dataframe):
                     with tab1:
                         hp.create_wordcloud(texts_df, 'log_notes')
                     with tab2:
-                        texts_df['processed_text'] = texts_df['log_notes'].apply(hp.text_preprocessor)
-                        texts_df['sentiment'] = texts_df['processed_text'].apply(hp.sentiment_analyzer)
+                        texts_df = texts_df.assign(sentiment=hp.get_note_sentiments(texts_df['log_notes']))
                         overview_sentiments = hp.get_sentiment_results(texts_df, 'sentiment')
                         fig, ax = plt.subplots(figsize=(4,3))
                         ax.pie(overview_sentiments['Percentage'], labels=overview_sentiments['Sentiment'], autopct='%1.1f%%', startangle=90)
                         ax.axis('equal')
                         st.pyplot(fig)
+                        plt.close(fig)
         
         # log calendar chart
         st.subheader("📅 Log Calendar")
-        fig,ax = hp.plot_calplot(dataframe, 'log_date')
-        st.pyplot(fig, use_container_width=True)
+        hp.show_calplot(dataframe, 'log_date')
 
     # visuals for activity analytics page
     elif st.session_state.demo_analytics_view == "📈 Activity Analytics":
@@ -412,7 +406,7 @@ def demo_main(dataframe):
                 start_date = pd.to_datetime(dataframe['start_date'].unique()[0])
                 tracking = dataframe['tracking_type'].unique()[0]
                 if tracking == "Yes/No (Completed or not)":
-                    actual_logs = dataframe[dataframe['activity'] == "Yes"].shape[0]
+                    actual_logs = int(dataframe['completed'].sum())
                 else:
                     actual_logs = dataframe.shape[0]
                 expected_logs = hp.calculate_expected_logs(start_date, freq)
@@ -441,11 +435,11 @@ def demo_main(dataframe):
                 tracking = dataframe['tracking_type'].unique()[0]
                 if tracking == "Yes/No (Completed or not)":
                     # Yes/No (Completed or not) tracking
-                    completed = dataframe[dataframe['activity'] == "Yes"].shape[0]
+                    completed = int(dataframe['completed'].sum())
                     st.metric(label="Completed", value=completed, delta_color="normal", border=True)
                 elif tracking == "Duration (Minutes/hours)":
                     # duration tracking
-                    total_duration = dataframe['activity'].sum()
+                    total_duration = int(dataframe['value'].sum())
                     if total_duration > 60:
                         hours = round(total_duration / 60,2)
                         st.metric(label="Total Duration (hrs)", value=hours, delta_color="normal", border=True)
@@ -453,15 +447,15 @@ def demo_main(dataframe):
                         st.metric(label="Total Duration (mins)", value=total_duration, delta_color="normal", border=True)
                 elif tracking == "Count (Number-based)":
                     # count tracking
-                    total_count = dataframe['activity'].sum()
+                    total_count = int(dataframe['value'].sum())
                     goal_units = dataframe['goal_units'].unique()[0]
                     st.metric(label=goal_units.capitalize(), value=total_count, delta_color="normal", border=True)
             with kpi6:
                 # goal achievement rate
                 goal = dataframe['goal'].unique()[0]
                 if tracking != "Yes/No (Completed or not)":
-                    dataframe['goal_achievement'] = ((dataframe['activity'].astype(float) / float(goal)) * 100).clip(upper=100)
-                    goal_achievement = f"{round(dataframe['goal_achievement'].mean(),2)}%"
+                    log_goal_achievement = ((dataframe['value'] / float(goal)) * 100).clip(upper=100)
+                    goal_achievement = f"{round(log_goal_achievement.mean(),2)}%"
                 else:
                     goal_achievement = 'N/A'
                 st.metric(label="Goal Achievement Rate", value=goal_achievement, border=True)
@@ -481,7 +475,7 @@ def demo_main(dataframe):
                     habit = dataframe.iloc[0]
                     goal = int(habit['goal'])
                     goal_units = habit['goal_units']
-                    chart = hp.plot_line_chart(dataframe, 'log_date', 'activity', 'Log Date', goal_units,'goal', y_min=0, y_max=goal+10, y_tick_count=5)
+                    chart = hp.plot_line_chart(dataframe, 'log_date', 'value', 'Log Date', goal_units,'goal', y_min=0, y_max=goal+10, y_tick_count=5)
                     st.altair_chart(chart, use_container_width=True)
                 else:
                     st.info("This visual is not available for this activity")
@@ -489,10 +483,9 @@ def demo_main(dataframe):
             # day of week visual
             with st.container(height=500):
                 st.subheader("🗓️ Activity Logs by Day of Week")
-                dataframe['day_of_week'] = dataframe['log_date'].dt.day_name()
                 order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                dataframe['day_of_week'] = pd.Categorical(dataframe['day_of_week'], categories=order, ordered=True)
-                day_counts = dataframe['day_of_week'].value_counts().sort_index().reset_index()
+                day_of_week = pd.Series(pd.Categorical(dataframe['log_date'].dt.day_name(), categories=order, ordered=True), name='day_of_week')
+                day_counts = day_of_week.value_counts().sort_index().reset_index()
                 chart = hp.plot_bar_chart(day_counts, 'day_of_week', 'count', '', 'Number of Logs', orientation='vertical')
                 st.altair_chart(chart, use_container_width=True)
         
@@ -514,13 +507,13 @@ def demo_main(dataframe):
                     with tab1:
                         hp.create_wordcloud(dataframe, 'log_notes')
                     with tab2:
-                        texts_df['processed_text'] = texts_df['log_notes'].apply(hp.text_preprocessor)
-                        texts_df['sentiment'] = texts_df['processed_text'].apply(hp.sentiment_analyzer)
+                        texts_df = texts_df.assign(sentiment=hp.get_note_sentiments(texts_df['log_notes']))
                         overview_sentiments = hp.get_sentiment_results(texts_df, 'sentiment')
                         fig,ax = plt.subplots(figsize=(4,3))
                         ax.pie(overview_sentiments['Percentage'], labels=overview_sentiments['Sentiment'], autopct='%1.1f%%', startangle=90)
                         ax.axis('equal')
                         st.pyplot(fig)
+                        plt.close(fig)
                         st.write("Sentiment analysis of activity logs")
             # log intervals over time
             with st.container(height=500):
@@ -534,8 +527,7 @@ def demo_main(dataframe):
         
         # log calendar chart
         st.subheader("📅 Log Calendar")
-        fig,ax = hp.plot_calplot(dataframe, 'log_date', cmap='YlGn_r')
-        st.pyplot(fig, use_container_width=True)
+        hp.show_calplot(dataframe, 'log_date', cmap='YlGn_r')
 
     elif st.session_state.demo_analytics_view == "🗃️ Data":
         # data table for habits and activities
@@ -0,0 +1,47 @@
+"""
+Import Logs Module
+
+This module implements the page for importing historical activity logs from a file in the Streamlit web app.
+Users upload a CSV, Excel or JSON file, rows are validated against their habits, and valid rows are imported in chunks.
+"""
+import streamlit as st
+from functools import partial
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app_streamlit.utils import supabase_client as supabase
+from app_streamlit.utils import bulk_import as bi
+
+def show_import_logs(user_id):
+    """
+    Display the activity log import page.
+    Shows the rows that were rejected and a per-chunk report of the rows that were imported.
+    """
+    st.write("Upload a file with one activity log per row and the columns "
+             "**habit**, **log_date**, **activity** and **rating**. "
+             "Add **log_notes** to import notes, and **category** when habits in different categories share a name.")
+    uploaded_file = st.file_uploader("Activity log file", type=['csv', 'xlsx', 'xls', 'json'])
+    if uploaded_file is None:
+        return
+
+    try:
+        df = bi.read_activity_file(uploaded_file)
+        valid_df, errors_df = bi.validate_activity_logs(df, supabase.get_habit_lookup(user_id))
+    except Exception as e:
+        st.error(f"Could not read the file: {e}")
+        return
+
+    st.write(f"{len(valid_df)} of {len(df)} rows are ready to import.")
+    if not errors_df.empty:
+        st.warning(f"{len(errors_df)} rows will be skipped.")
+        st.dataframe(errors_df.rename(columns={'row': 'Row', 'error': 'Error'}), hide_index=True)
+
+    if len(valid_df) > 0 and st.button("Import activity logs"):
+        with st.spinner("Importing activity logs..."):
+            report = bi.import_activity_logs(valid_df, partial(supabase.insert_activity_logs, user_id))
+        inserted = int(report['inserted'].sum())
+        if inserted == len(valid_df):
+            st.success(f"Imported {inserted} activity logs.")
+        else:
+            st.error(f"Imported {inserted} of {len(valid_df)} activity logs.")
+            st.dataframe(report[report['error'].notna()], hide_index=True)
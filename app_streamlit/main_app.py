@@ -3,10 +3,13 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import time
+from functools import partial
 from datetime import datetime, timedelta
 import yaml
 from yaml.loader import SafeLoader
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from supabase import create_client, Client
 
 # Set page configuration
@@ -18,8 +21,14 @@ from habit_wizard import create_habit_wizard
 from activity_wizard import create_activity_wizard
 import analytics as an
 from todo import show_unlogged_activities
-from utils import supabase_client as sp
+from import_logs import show_import_logs
+from app_streamlit.utils import supabase_client as sp
 from utils import user_auth as auth
+from app_streamlit.utils import lazy_resources as lr
+from app_streamlit.utils import heartbeat as hb
+
+# load nltk, wordcloud and calplot in the background so the first analytics render is fast
+lr.start_warmup()
 
 
 # Initialize session state variables if they don't exist
@@ -47,22 +56,18 @@ if 'username' not in st.session_state:
     st.session_state.username = None
 if 'user_id' not in st.session_state:
     st.session_state.user_id = None
-if 'supabase' not in st.session_state:
-    st.session_state.supabase = sp.init_supabase()
-
 
-supabase = sp.init_supabase()
 
-# check probe table when the app starts to keep supabase connection alive
+# ping the probe table in the background to keep supabase connection alive
 def keep_supabase_alive():
     """Function to keep the Supabase connection alive."""
     try:
-        # Check if the connection is alive by querying a simple table
-        supabase.table('probe_action').select('*').execute()
+        # the heartbeat runs at most once per interval per process and does not block reruns
+        hb.start_heartbeat(sp.init_supabase())
     except Exception as e:
         print(f"Error keeping Supabase connection alive: {e}")
 
-# Call the function to check the probe table
+# Start the heartbeat when the app starts
 keep_supabase_alive()
 
 
@@ -97,8 +102,8 @@ def forgot_username_dialog():
 def logout():
     keys_to_clear = ['show_login','show_signup','forgot_password','authentication_status','just_logged_in',
                      'active_view','view_radio','sub_option','demo_analytics_view','username','user_id',
-                     'supabase',"current_step","form_data","warning_confirm", 'habit_details','activity_data',
-                       'activity_step', 'confirmed_save','duration_warning_accepted',]
+                     "current_step","form_data","warning_confirm", 'habit_details','activity_data',
+                       'activity_step', 'confirmed_save','duration_warning_accepted','data_cache','filter_cache','feature_cache',]
     for key in keys_to_clear:
         if key in st.session_state:
             del st.session_state[key]
@@ -231,7 +236,7 @@ def show_main_app():
 
         # main radio selections
         main_view = st.sidebar.radio("Main Menu",
-                     ["Analytics","Unlogged Activities","Log Activity", "Create Habit" ],
+                     ["Analytics","Unlogged Activities","Log Activity", "Create Habit", "Import Logs" ],
                      key='view_radio',
                      on_change=update_active_view,
                      horizontal=False)
@@ -249,7 +254,10 @@ def show_main_app():
                 if len(merged_df) < 10 or len(habits_df) < 5:
                     st.warning("Not enough data for comprehensive analytics.")
                     st.info("Please create more habits and log more activities.")
-                an.show_analytics(merged_df)
+                an.show_analytics(merged_df, sp.get_daily_rollup(st.session_state.user_id),
+                                  load_notes=partial(sp.get_log_notes, st.session_state.user_id),
+                                  user_id=st.session_state.user_id,
+                                  data_version=sp.get_data_version(st.session_state.user_id))
             st.session_state.just_logged_in = False
         elif main_view == "Log Activity":
             if len(habits_df) == 0:
@@ -268,6 +276,13 @@ def show_main_app():
                 st.title("📋 Unlogged Activities")
                 show_unlogged_activities(st.session_state.user_id)
 
+        elif main_view == "Import Logs":
+            if len(habits_df) == 0:
+                st.warning("No habits available. Please create a habit first.")
+            else:
+                st.title("📥 Import Activity Logs")
+                show_import_logs(st.session_state.user_id)
+
         if st.sidebar.button("Logout"):
             st.session_state.current_page = "home"
             logout()
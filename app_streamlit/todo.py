@@ -15,10 +15,10 @@ from app_streamlit.utils import supabase_client as supabase
 def show_unlogged_activities(user_id):
     """
     Display unlogged activities for the user.
-    This function fetches the unlogged activities from the database and displays them in the Streamlit app.
+    This function fetches the habits that are due from the database and displays them in the Streamlit app.
     """
     # get unlogged activities
-    daily_unlogged,weekly_unlogged,monthly_unlogged = supabase.get_unlogged_activities(st.session_state.user_id)
+    daily_unlogged,weekly_unlogged,monthly_unlogged = supabase.get_unlogged_activities(user_id)
 
     if not daily_unlogged and not weekly_unlogged and not monthly_unlogged:
         st.write("No unlogged activities for today.")
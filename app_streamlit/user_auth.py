@@ -9,6 +9,7 @@ import streamlit as st
 import requests
 import smtplib
 from email.mime.text import MIMEText
+from app_streamlit.utils import supabase_client as sp
 # from email.mime.multipart import MIMEMultipart
 # from sendgrid import SendGridAPIClient
 # from sendgrid.helpers.mail import Mail
@@ -42,7 +43,7 @@ def is_valid_password(password):
 def register_user(email, username, firstname, lastname, password, repeat_password):
     """Registers users with preauthorization and saves to database."""
     # supabase client
-    supabase = st.session_state.supabase
+    supabase = sp.init_supabase()
     # validate inputs
     if not all([email, username, firstname, lastname, password]):
         return False, "All fields are required."
@@ -99,7 +100,7 @@ def register_user(email, username, firstname, lastname, password, repeat_passwor
 def login_user(username, password):
     """Log user in and check credentials."""
     # supabase client
-    supabase = st.session_state.supabase
+    supabase = sp.init_supabase()
     # validate inputs
     if not all([username, password]):
         return False, None, "All fields are required."
@@ -160,7 +161,7 @@ Accountability Partner Team
 def forgot_password(email):
     """Handles forgot password functionality."""
     # supabase client
-    supabase = st.session_state.supabase
+    supabase = sp.init_supabase()
     # validate email
     if not is_valid_email(email):
         return False, "Invalid email format."
@@ -196,7 +197,7 @@ def forgot_password(email):
 def forgot_username(email):
     """Handles forgot username functionality."""
     # supabase client
-    supabase = st.session_state.supabase
+    supabase = sp.init_supabase()
     # validate email
     if not is_valid_email(email):
         return False, "Invalid email format."
@@ -0,0 +1,154 @@
+"""
+Bulk Import Module
+
+This module imports historical activity logs from CSV, Excel or JSON files.
+Habit names are resolved to ids with one lookup, all rows are validated together,
+and valid rows are written in chunks so a failed chunk does not stop the rest of the import.
+"""
+import os
+import pandas as pd
+
+# columns every imported file must have, a category column picks between habits with the same name
+REQUIRED_COLUMNS = ['habit', 'log_date', 'activity', 'rating']
+# rows written per insert
+CHUNK_SIZE = 500
+# tracking types and the activities they accept
+YES_NO_TRACKING = "Yes/No (Completed or not)"
+NUMERIC_TRACKING = ["Duration (Minutes/hours)", "Count (Number-based)"]
+
+
+def read_activity_file(file, file_format=None):
+    """Read activity logs from a csv, xlsx or json file path or uploaded file"""
+    if file_format is None:
+        name = getattr(file, 'name', file)
+        file_format = os.path.splitext(str(name))[1].lstrip('.')
+    file_format = file_format.lower()
+    if file_format == 'csv':
+        df = pd.read_csv(file)
+    elif file_format in ('xlsx', 'xls'):
+        df = pd.read_excel(file)
+    elif file_format == 'json':
+        df = pd.read_json(file)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+    # normalize column names
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+    return df.reset_index(drop=True)
+
+def _strip(values):
+    """Get values as stripped strings, with missing values as empty strings"""
+    return values.astype(object).where(values.notna(), '').astype(str).str.strip()
+
+def resolve_habits(df, habits):
+    """
+    Resolve the habit names in df to habit ids.
+    habits is a DataFrame with 'habit_id', 'name', 'category' and 'tracking_type' columns.
+    Rows with a category are matched on name and category, other rows on name alone.
+    Returns the habit ids, with NaN for rows that match no habit or several, and a mask of names that match several habits.
+    """
+    habit_names = _strip(habits['name'])
+    habit_categories = _strip(habits['category'])
+    names = _strip(df['habit'])
+    categories = _strip(df['category']) if 'category' in df.columns else pd.Series('', index=df.index)
+    # names of exactly one habit resolve without a category
+    unique_names = ~habit_names.duplicated(keep=False)
+    by_name = pd.Series(habits['habit_id'][unique_names].to_numpy(), index=habit_names[unique_names])
+    habit_id = names.map(by_name)
+    # name and category pairs resolve rows that have a category
+    keys = habit_names + '\x1f' + habit_categories
+    unique_keys = ~keys.duplicated(keep=False)
+    by_key = pd.Series(habits['habit_id'][unique_keys].to_numpy(), index=keys[unique_keys])
+    has_category = categories != ''
+    habit_id = habit_id.where(~has_category, (names + '\x1f' + categories).map(by_key))
+    ambiguous = ~has_category & names.isin(habit_names[~unique_names])
+    return habit_id, ambiguous
+
+def validate_activity_logs(df, habits):
+    """
+    Validate activity logs and resolve habit names to ids.
+    habits is a DataFrame with 'habit_id', 'name', 'category' and 'tracking_type' columns.
+    Returns a DataFrame of rows ready to insert and a DataFrame of rejected rows with the reasons.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    # 1-based record number for the error report
+    row = pd.Series(range(1, len(df) + 1), index=df.index)
+    today = pd.to_datetime("today").normalize()
+
+    habit_id, ambiguous = resolve_habits(df, habits)
+    tracking = habit_id.map(pd.Series(habits['tracking_type'].astype(object).to_numpy(), index=habits['habit_id']))
+    log_date = pd.to_datetime(df['log_date'], errors='coerce')
+    rating = pd.to_numeric(df['rating'], errors='coerce')
+    activity = df['activity'].astype(str).str.strip()
+    # whole numbers are stored without a decimal point
+    numeric_activity = pd.to_numeric(df['activity'], errors='coerce')
+    whole_numbers = numeric_activity.notna() & (numeric_activity % 1 == 0)
+    activity = activity.where(~whole_numbers, numeric_activity[whole_numbers].astype('Int64').astype(str))
+    # yes and no are stored capitalized
+    is_yes_no = tracking == YES_NO_TRACKING
+    activity = activity.where(~is_yes_no, activity.str.capitalize())
+    missing_activity = df['activity'].isna() | (activity == '')
+
+    checks = [
+        (ambiguous, "habit name is used in several categories, add a category column"),
+        (habit_id.isna() & ~ambiguous, "unknown habit"),
+        (log_date.isna(), "invalid log date"),
+        (log_date > today, "log date is in the future"),
+        (~rating.between(1, 5) | (rating % 1 != 0), "rating must be a whole number from 1 to 5"),
+        (missing_activity, "missing activity"),
+        (~missing_activity & is_yes_no & ~activity.isin(['Yes', 'No']), "activity must be Yes or No for this habit"),
+        (~missing_activity & tracking.isin(NUMERIC_TRACKING) & ~(numeric_activity >= 0),
+         "activity must be a number of 0 or more for this habit"),
+    ]
+    invalid = pd.Series(False, index=df.index)
+    errors = []
+    for mask, reason in checks:
+        invalid |= mask
+        errors.append(pd.DataFrame({'row': row[mask], 'error': reason}))
+    errors_df = pd.concat(errors).groupby('row', as_index=False)['error'].agg('; '.join)
+
+    valid = ~invalid
+    notes = df['log_notes'] if 'log_notes' in df.columns else pd.Series('', index=df.index)
+    valid_df = pd.DataFrame({
+        'habit_id': habit_id[valid].astype(int),
+        'log_date': log_date[valid].dt.strftime('%Y-%m-%d'),
+        'activity': activity[valid],
+        'rating': rating[valid].astype(int),
+        'log_notes': notes[valid].fillna('').astype(str)
+    })
+    # index rows by their record number in the file
+    valid_df.index = row[valid].to_numpy()
+    return valid_df, errors_df
+
+def import_activity_logs(valid_df, insert_chunk, chunk_size=CHUNK_SIZE):
+    """
+    Write validated activity logs in chunks with the given insert function.
+    Returns a report with the file records covered, rows inserted and any error for each chunk.
+    """
+    report = []
+    for start in range(0, len(valid_df), chunk_size):
+        chunk = valid_df.iloc[start:start + chunk_size]
+        try:
+            insert_chunk(chunk.to_dict('records'))
+            inserted, error = len(chunk), None
+        except Exception as e:
+            inserted, error = 0, str(e)
+        report.append({
+            'chunk': len(report) + 1,
+            'first_row': chunk.index[0],
+            'last_row': chunk.index[-1],
+            'inserted': inserted,
+            'error': error
+        })
+    return pd.DataFrame(report, columns=['chunk', 'first_row', 'last_row', 'inserted', 'error'])
+
+def import_activity_file(file, habits, insert_chunk, chunk_size=CHUNK_SIZE, file_format=None):
+    """
+    Read, validate and import an activity log file.
+    Returns the per-chunk import report and the rejected rows.
+    """
+    df = read_activity_file(file, file_format)
+    valid_df, errors_df = validate_activity_logs(df, habits)
+    report = import_activity_logs(valid_df, insert_chunk, chunk_size)
+    return report, errors_df
@@ -0,0 +1,105 @@
+"""
+Cache Bus Module
+
+This module coordinates cached reads with writes.
+Write functions publish a (user_id, table) event after changing a table, and cached readers
+drop that user's entries for the tables they read from. A result is not cached when a write
+to one of its tables was published while it was being read. Cached entries also expire after a TTL,
+each reader keeps at most maxsize entries, and hits, misses and evictions are counted per reader.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# seconds a cached result stays valid
+DEFAULT_TTL = int(os.environ.get("CACHE_TTL", 600))
+# entries kept per cached reader
+DEFAULT_MAXSIZE = 256
+
+_lock = threading.RLock()
+# table name -> callbacks called with (user_id, table)
+_subscribers = {}
+# reader name -> counters
+_stats = {}
+# (user_id, table) -> number of writes published
+_generations = {}
+
+
+def subscribe(table, callback):
+    """Call callback(user_id, table) whenever a write to the table is published"""
+    with _lock:
+        callbacks = _subscribers.setdefault(table, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+def publish(user_id, table):
+    """Tell subscribers that a user's rows in a table have changed"""
+    with _lock:
+        _generations[(user_id, table)] = _generations.get((user_id, table), 0) + 1
+        callbacks = list(_subscribers.get(table, []))
+    for callback in callbacks:
+        callback(user_id, table)
+
+def cached(tables, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+    """
+    Cache a reader whose first argument is the user id.
+    Entries for a user are dropped when a write to any of the given tables is published for that user.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        entries = OrderedDict()
+        stats = _stats.setdefault(name, {"hits": 0, "misses": 0, "evictions": 0, "size": 0})
+
+        def evict_user(user_id, table):
+            """Drop the cached results for a user"""
+            with _lock:
+                for key in [key for key in entries if key[0] == user_id]:
+                    del entries[key]
+                    stats["evictions"] += 1
+                stats["size"] = len(entries)
+
+        for table in tables:
+            subscribe(table, evict_user)
+
+        @wraps(func)
+        def wrapper(user_id, *args, **kwargs):
+            key = (user_id, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with _lock:
+                entry = entries.get(key)
+                if entry is not None and entry[0] > now:
+                    entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return entry[1]
+                stats["misses"] += 1
+                generations = [_generations.get((user_id, table), 0) for table in tables]
+            value = func(user_id, *args, **kwargs)
+            with _lock:
+                # a write published during the call may not be in the result, so it is not cached
+                if generations != [_generations.get((user_id, table), 0) for table in tables]:
+                    return value
+                entries[key] = (now + ttl, value)
+                entries.move_to_end(key)
+                # drop the least recently used entries
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+                    stats["evictions"] += 1
+                stats["size"] = len(entries)
+            return value
+
+        def cache_clear():
+            """Drop every cached result of this reader"""
+            with _lock:
+                entries.clear()
+                stats["size"] = 0
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+def get_cache_stats():
+    """Get the hit, miss, eviction and size counters of every cached reader"""
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
@@ -0,0 +1,102 @@
+"""
+Filter Engine Module
+
+This module filters activity logs for the analytics sidebars without scanning the whole frame.
+Logs are sorted by date once, so date ranges are found with a binary search, and the row positions
+of each category and habit are kept in a map. Results are memoized per filter selection.
+"""
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# filter results kept per index
+MAX_RESULTS = 32
+
+
+def build_filter_index(df, date_col='log_date', category_col='category', habit_col='name'):
+    """Sort logs by date and map every category and habit to its row positions"""
+    data = df.sort_values(date_col, kind='mergesort').reset_index(drop=True)
+    dates = pd.to_datetime(data[date_col]).to_numpy()
+    positions = {}
+    for col in (category_col, habit_col):
+        # positions stay sorted by date within each group
+        groups = data.groupby(col, sort=False, observed=True).indices if not data.empty else {}
+        positions[col] = {key: np.sort(rows) for key, rows in groups.items()}
+    return {
+        'source': df,
+        'data': data,
+        'dates': dates,
+        'date_col': date_col,
+        'category_col': category_col,
+        'habit_col': habit_col,
+        'positions': positions,
+        'results': OrderedDict()
+    }
+
+def get_filter_index(cache, df, date_col='log_date', category_col='category', habit_col='name'):
+    """Get the filter index for df from a cache dict, e.g. one kept in session state, rebuilding it when df changes"""
+    index = cache.get('index')
+    if (index is None or index['source'] is not df or index['date_col'] != date_col
+            or index['category_col'] != category_col or index['habit_col'] != habit_col):
+        index = build_filter_index(df, date_col, category_col, habit_col)
+        cache['index'] = index
+    return index
+
+def _date_bounds(index, start_date=None, end_date=None):
+    """Get the first and past-the-end row positions of a date range, both ends included"""
+    dates = index['dates']
+    start = 0 if start_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side='left')
+    end = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side='right')
+    return int(start), int(end)
+
+def _rows_in_range(rows, start, end):
+    """Get the sorted row positions that fall inside [start, end)"""
+    return rows[np.searchsorted(rows, start, side='left'):np.searchsorted(rows, end, side='left')]
+
+def filter_logs(index, start_date=None, end_date=None, category=None, habit=None):
+    """
+    Get the logs in a date range for a category and habit, any of which may be None for no filter.
+    Results are memoized per filter selection and should be treated as read-only.
+    """
+    key = (start_date, end_date, category, habit)
+    results = index['results']
+    if key in results:
+        results.move_to_end(key)
+        return results[key]
+    start, end = _date_bounds(index, start_date, end_date)
+    rows = None
+    for col, value in ((index['category_col'], category), (index['habit_col'], habit)):
+        if value is None:
+            continue
+        value_rows = _rows_in_range(index['positions'][col].get(value, np.array([], dtype=np.intp)), start, end)
+        rows = value_rows if rows is None else np.intersect1d(rows, value_rows, assume_unique=True)
+    # a plain date range is a slice of the sorted frame
+    result = index['data'].iloc[start:end] if rows is None else index['data'].iloc[rows]
+    results[key] = result
+    if len(results) > MAX_RESULTS:
+        results.popitem(last=False)
+    return result
+
+def filter_options(index, col, start_date=None, end_date=None, category=None):
+    """Get the categories or habits that have logs in a date range, optionally within one category"""
+    start, end = _date_bounds(index, start_date, end_date)
+    category_rows = None
+    if category is not None:
+        category_rows = _rows_in_range(index['positions'][index['category_col']].get(category, np.array([], dtype=np.intp)), start, end)
+    options = []
+    for value, rows in index['positions'][col].items():
+        rows = _rows_in_range(rows, start, end)
+        if category_rows is not None:
+            rows = np.intersect1d(rows, category_rows, assume_unique=True)
+        if len(rows):
+            options.append((rows[0], value))
+    # list options in order of their first log, like unique() on the frame
+    return [value for _, value in sorted(options, key=lambda option: option[0])]
+
+def date_range(index, category=None, habit=None):
+    """Get the first and last log date for a category and habit"""
+    result = filter_logs(index, category=category, habit=habit)
+    if result.empty:
+        return None, None
+    dates = result[index['date_col']]
+    return dates.iloc[0], dates.iloc[-1]
@@ -0,0 +1,359 @@
+"""
+Habit Metrics Module
+
+This module holds the vectorized habit calculations shared by the Streamlit and Tkinter analytics pages.
+"""
+import pandas as pd
+import numpy as np
+
+# days since the last log for a streak to still count as current
+ACTIVE_WINDOW_DAYS = {
+    "Daily": 1,
+    "Weekly": 7,
+    "Monthly": 31
+}
+
+
+def calculate_streaks_by_habit(df):
+    """
+    Calculate the longest and current streak for every habit at once.
+    Expects a DataFrame with 'habit_id', 'log_date', and 'frequency' columns.
+    Returns a DataFrame with one row per habit.
+    """
+    columns = ['habit_id', 'frequency', 'longest_streak', 'current_streak', 'last_log_date']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    data = df[['habit_id', 'log_date', 'frequency']].copy()
+    data['log_date'] = pd.to_datetime(data['log_date']).dt.normalize()
+    # frequency is a habit attribute, use the first value for each habit
+    data['frequency'] = data.groupby('habit_id', sort=False)['frequency'].transform('first')
+    data = data.sort_values(['habit_id', 'log_date'], kind='mergesort')
+
+    habit_ids = data['habit_id'].to_numpy()
+    dates = data['log_date'].to_numpy(dtype='datetime64[D]')
+    freq = data['frequency'].to_numpy()
+
+    # gaps and month changes between consecutive logs of the same habit
+    same_habit = np.zeros(len(data), dtype=bool)
+    same_habit[1:] = habit_ids[1:] == habit_ids[:-1]
+    gaps = np.zeros(len(data), dtype=np.int64)
+    gaps[1:] = (dates[1:] - dates[:-1]).astype(np.int64)
+    months = dates.astype('datetime64[M]')
+    month_changed = np.zeros(len(data), dtype=bool)
+    month_changed[1:] = months[1:] != months[:-1]
+
+    # a log continues the streak if the gap matches the habit frequency
+    continues = same_habit & (
+        ((freq == "Daily") & (gaps == 1)) |
+        ((freq == "Weekly") & (gaps <= 7)) |
+        ((freq == "Monthly") & month_changed & (gaps <= 31))
+    )
+    # segment logs into runs and get the run length at each log
+    run_id = np.cumsum(~continues)
+    run_lengths = np.bincount(run_id)
+    data['run_length'] = run_lengths[run_id]
+
+    streaks = data.groupby('habit_id', sort=False).agg(
+        frequency=('frequency', 'first'),
+        longest_streak=('run_length', 'max'),
+        last_run=('run_length', 'last'),
+        last_log_date=('log_date', 'last')
+    ).reset_index()
+
+    # current streak only counts if the habit was logged recently enough
+    today = pd.to_datetime("today").normalize()
+    days_since_last = (today - streaks['last_log_date']).dt.days
+    # frequency may be a category dtype, map the plain labels
+    window = streaks['frequency'].astype(object).map(ACTIVE_WINDOW_DAYS).astype(float)
+    is_still_active = days_since_last <= window
+    streaks['current_streak'] = np.where(is_still_active, streaks['last_run'], 0)
+    return streaks[columns]
+
+
+def calculate_streaks(dates, freq):
+    """Calculate the longest and current streak for a single habit's log dates"""
+    if len(dates) == 0:
+        return 0,0
+    df = pd.DataFrame({'habit_id': 0, 'log_date': pd.to_datetime(list(dates)), 'frequency': freq})
+    streaks = calculate_streaks_by_habit(df)
+    return int(streaks['longest_streak'].iloc[0]), int(streaks['current_streak'].iloc[0])
+
+
+def calculate_streaks_grouped(df):
+    """
+    Calculate the longest and current streak across multiple habits with different frequencies.
+    Expects a DataFrame with 'habit_id', 'log_date', and 'frequency' columns.
+    """
+    streaks = calculate_streaks_by_habit(df)
+    if streaks.empty:
+        return 0,0
+    return int(streaks['longest_streak'].max()), int(streaks['current_streak'].max())
+
+
+def calculate_expected_logs(date, frequency):
+    today = pd.to_datetime("today").normalize()
+    date = pd.to_datetime(date)
+    # if frequency is daily, expected logs is days between start date and today
+    if frequency == "Daily":
+        expected_logs = max((today - date).days + 1, 1)
+    # if frequency is weekly, expected logs is weeks between start date and today
+    elif frequency == "Weekly":
+        expected_logs = max(((today - date).days // 7)+1,1)
+    # if frequency is monthly, expected logs is months between start date and today
+    elif frequency == "Monthly":
+        expected_logs = max(((today.year - date.year) * 12 + (today.month - date.month)) + 1, 1)
+    return expected_logs
+
+
+def calculate_expected_logs_vectorized(start_dates, frequencies):
+    """Calculate expected logs for columns of start dates and frequencies"""
+    today = pd.to_datetime("today").normalize()
+    start_dates = pd.to_datetime(pd.Series(start_dates).reset_index(drop=True))
+    frequencies = pd.Series(frequencies).reset_index(drop=True)
+    # days and calendar months between start date and today
+    days = (today - start_dates).dt.days
+    months = (today.year - start_dates.dt.year) * 12 + (today.month - start_dates.dt.month)
+    expected_logs = np.select(
+        [frequencies == "Daily", frequencies == "Weekly", frequencies == "Monthly"],
+        [days + 1, (days // 7) + 1, months + 1],
+        default=1
+    )
+    return np.maximum(expected_logs, 1).astype(int)
+
+
+def calculate_completion_by_habit(df):
+    """
+    Calculate expected logs, actual logs and completion rate for every habit.
+    Expects a DataFrame with 'habit_id', 'frequency' and 'start_date' columns, and 'name' if available.
+    """
+    habit_columns = [col for col in ['habit_id', 'name', 'frequency', 'start_date'] if col in df.columns]
+    habits = df[habit_columns].drop_duplicates(subset='habit_id').reset_index(drop=True)
+    # actual logs per habit in a single pass
+    actual_logs = df.groupby('habit_id').size()
+    habits['actual_logs'] = habits['habit_id'].map(actual_logs).fillna(0).astype(int)
+    # expected logs based on habit frequency
+    habits['expected_logs'] = calculate_expected_logs_vectorized(habits['start_date'], habits['frequency'])
+    habits['completion_rate'] = ((habits['actual_logs'] / habits['expected_logs']) * 100).round(2)
+    return habits
+
+
+def calculate_average_completion(df):
+    """Calculates the overall completion rate across all habits"""
+    if df.empty:
+        return 0
+    completion = calculate_completion_by_habit(df)
+    total_expected_logs = completion['expected_logs'].sum()
+    total_actual_logs = completion['actual_logs'].sum()
+    if total_expected_logs > 0:
+        average_completion_rate = round((total_actual_logs/total_expected_logs) * 100,2)
+    else:
+        average_completion_rate = 0
+    return float(average_completion_rate)
+
+
+def calculate_completion_rate(df):
+    """Calculates the completion rate table for each habit"""
+    completion = calculate_completion_by_habit(df)
+    consistency_df = pd.DataFrame({
+        "Habit": completion['name'],
+        "Expected Logs": completion['expected_logs'],
+        "Actual Logs": completion['actual_logs'],
+        "Completion Rate(%)": completion['completion_rate']
+    })
+    return consistency_df
+
+
+def calculate_habit_stats(df):
+    """
+    Calculate per-habit statistics from activity logs, with the columns get_habit_stats in db_operations returns.
+    Expects a DataFrame with 'habit_id', 'name', 'category', 'log_id', 'log_date', 'rating' and 'goal_achievement' columns.
+    """
+    columns = ['habit_id', 'name', 'category', 'total_logs', 'average_rating',
+               'first_log_date', 'last_log_date', 'average_goal_achievement']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    stats = df.groupby('habit_id', observed=True).agg(
+        name=('name', 'first'),
+        category=('category', 'first'),
+        total_logs=('log_id', 'count'),
+        average_rating=('rating', 'mean'),
+        first_log_date=('log_date', 'min'),
+        last_log_date=('log_date', 'max'),
+        average_goal_achievement=('goal_achievement', 'mean')
+    ).reset_index()
+    stats['average_rating'] = stats['average_rating'].round(2)
+    stats['average_goal_achievement'] = stats['average_goal_achievement'].round(2)
+    return stats[columns]
+
+
+def calculate_overview_kpis(stats_df):
+    """
+    Calculate the Overview KPIs from per-habit statistics.
+    Expects the output of calculate_habit_stats or get_habit_stats in db_operations, with 'total_logs', 'average_rating' and 'average_goal_achievement' columns.
+    """
+    if stats_df.empty or stats_df['total_logs'].sum() == 0:
+        return {"total_habits": 0, "total_logs": 0, "average_rating": 0, "average_goal_achievement": None}
+    total_logs = int(stats_df['total_logs'].sum())
+    # weight each habit's average by its number of logs
+    rating_total = (stats_df['average_rating'].astype(float) * stats_df['total_logs']).sum()
+    goal_stats = stats_df.dropna(subset=['average_goal_achievement'])
+    if goal_stats.empty:
+        average_goal_achievement = None
+    else:
+        goal_total = (goal_stats['average_goal_achievement'].astype(float) * goal_stats['total_logs']).sum()
+        average_goal_achievement = round(float(goal_total / goal_stats['total_logs'].sum()), 2)
+    return {
+        "total_habits": int((stats_df['total_logs'] > 0).sum()),
+        "total_logs": total_logs,
+        "average_rating": round(float(rating_total / total_logs), 2),
+        "average_goal_achievement": average_goal_achievement
+    }
+
+
+def average_rating_by_habit(stats_df):
+    """
+    Get the average rating per habit name from per-habit statistics, sorted from lowest to highest.
+    Habits sharing a name are combined, weighted by their number of logs.
+    """
+    stats = stats_df[stats_df['total_logs'] > 0]
+    rating_total = (stats['average_rating'].astype(float) * stats['total_logs']).groupby(stats['name']).sum()
+    total_logs = stats['total_logs'].groupby(stats['name']).sum()
+    habit_averages = (rating_total / total_logs).round(2).rename('rating').reset_index()
+    return habit_averages.sort_values(by='rating', ascending=True)
+
+
+def goal_achievement_by_habit(stats_df):
+    """Get the average goal achievement of goal-tracked habits from per-habit statistics, sorted from lowest to highest"""
+    goal_stats = stats_df.dropna(subset=['average_goal_achievement'])
+    habit_achievement = pd.DataFrame({
+        'habit_id': goal_stats['habit_id'],
+        'average_goal_achievement': goal_stats['average_goal_achievement'].astype(float).round(2),
+        'total_logs': goal_stats['total_logs'],
+        'habit_name': goal_stats['name']
+    })
+    return habit_achievement.sort_values(by='average_goal_achievement', ascending=True)
+
+
+def split_activity(activity):
+    """
+    Split free text activities into a numeric value and a completed flag.
+    Yes counts as 1 and No as 0, numeric activities count as themselves and other text has no value.
+    A log is completed when its value is above 0.
+    Matches the generated value and completed columns of activity_logs.
+    """
+    activity = pd.Series(activity)
+    text = activity.astype(str)
+    # only plain decimal numbers count, like the database columns
+    value = pd.to_numeric(text.where(text.str.fullmatch(r'[0-9]+(\.[0-9]+)?')), errors='coerce').astype(float)
+    value = value.mask(text == 'Yes', 1.0).mask(text == 'No', 0.0)
+    completed = value > 0
+    return completed, value
+
+
+def build_daily_rollup(df):
+    """
+    Roll activity logs up to one row per habit per day.
+    Expects a DataFrame with 'habit_id', 'log_date', 'rating' and 'value' or 'activity' columns.
+    Yes counts as 1 and No as 0 in the activity sum, numeric activities count as themselves.
+    """
+    columns = ['habit_id', 'log_date', 'log_count', 'activity_sum', 'rating_sum']
+    if df.empty:
+        # typed columns, so date accessors and comparisons work on an empty rollup
+        return pd.DataFrame({
+            'habit_id': pd.Series(dtype='int64'),
+            'log_date': pd.Series(dtype='datetime64[ns]'),
+            'log_count': pd.Series(dtype='int64'),
+            'activity_sum': pd.Series(dtype='float64'),
+            'rating_sum': pd.Series(dtype='Int64')
+        })[columns]
+    value = df['value'] if 'value' in df.columns else split_activity(df['activity'])[1]
+    data = pd.DataFrame({
+        'habit_id': df['habit_id'],
+        'log_date': pd.to_datetime(df['log_date']).dt.normalize(),
+        'activity_sum': value.fillna(0),
+        # ratings may be stored as nullable small ints, widen them before summing
+        'rating_sum': df['rating'].astype('Int64')
+    })
+    rollup = data.groupby(['habit_id', 'log_date']).agg(
+        log_count=('activity_sum', 'size'),
+        activity_sum=('activity_sum', 'sum'),
+        rating_sum=('rating_sum', 'sum')
+    ).reset_index()
+    return rollup[columns]
+
+
+def filter_daily_rollup(rollup, df):
+    """Get the rollup rows for the habits and date range of a filtered log DataFrame"""
+    if rollup is None or df.empty:
+        return build_daily_rollup(df)
+    start = pd.to_datetime(df['log_date']).min().normalize()
+    end = pd.to_datetime(df['log_date']).max().normalize()
+    mask = rollup['habit_id'].isin(df['habit_id'].unique()) & rollup['log_date'].between(start, end)
+    return rollup[mask]
+
+
+def daily_log_counts(rollup):
+    """Get the number of logs per day across all habits in a rollup"""
+    return rollup.groupby('log_date')['log_count'].sum().sort_index()
+
+
+def calculate_next_due_dates(frequencies, last_logged_at, start_dates=None):
+    """
+    Calculate the date each habit is next due: the day, Monday or first of the month after its last log.
+    A habit that has never been logged is due from its start date. Matches habit_next_due_date in the database.
+    """
+    frequencies = pd.Series(frequencies).astype(object).reset_index(drop=True)
+    last = pd.to_datetime(pd.Series(last_logged_at).reset_index(drop=True)).dt.normalize().astype('datetime64[ns]')
+    daily = last + pd.Timedelta(days=1)
+    weekly = last - pd.to_timedelta(last.dt.weekday, unit='D') + pd.Timedelta(days=7)
+    monthly = last.dt.to_period('M').dt.to_timestamp() + pd.DateOffset(months=1)
+    next_due = pd.Series(np.select(
+        [frequencies == "Daily", frequencies == "Weekly", frequencies == "Monthly"],
+        [daily.to_numpy(), weekly.to_numpy(), monthly.astype('datetime64[ns]').to_numpy()],
+        default=np.datetime64('NaT')
+    ), dtype='datetime64[ns]')
+    # never logged habits are due from their start date
+    if start_dates is None:
+        first_due = pd.Series(pd.Timestamp('1970-01-01'), index=last.index)
+    else:
+        first_due = pd.to_datetime(pd.Series(start_dates).reset_index(drop=True)).fillna(pd.Timestamp('1970-01-01'))
+    return next_due.where(last.notna(), first_due.astype('datetime64[ns]'))
+
+
+def calculate_due_habits(habits_df, logs_df):
+    """
+    Find the habits that are due: not logged in their current period and not past their end date.
+    Expects habits with 'habit_id', 'name' and 'frequency' columns, and 'start_date'/'end_date' if available,
+    and logs with 'habit_id' and 'log_date' columns, e.g. the activities or merged frame from get_data.
+    Returns the due habits with their last log date and next due date.
+    """
+    columns = ['habit_id', 'name', 'frequency', 'last_logged_at', 'next_due_date']
+    if habits_df.empty:
+        return pd.DataFrame(columns=columns)
+    today = pd.to_datetime("today").normalize()
+    habit_columns = [col for col in ['habit_id', 'name', 'frequency', 'start_date', 'end_date'] if col in habits_df.columns]
+    habits = habits_df[habit_columns].drop_duplicates(subset='habit_id').reset_index(drop=True)
+    # last log date per habit in a single pass
+    if logs_df.empty:
+        last_logged_at = pd.Series(dtype='datetime64[ns]')
+    else:
+        last_logged_at = pd.to_datetime(logs_df['log_date']).dt.normalize().groupby(logs_df['habit_id']).max()
+    habits['last_logged_at'] = last_logged_at.reindex(habits['habit_id']).to_numpy()
+    habits['next_due_date'] = calculate_next_due_dates(habits['frequency'], habits['last_logged_at'], habits.get('start_date'))
+    due = habits['next_due_date'] <= today
+    # ended habits are never due
+    if 'end_date' in habits.columns:
+        due &= habits['end_date'].isna() | (pd.to_datetime(habits['end_date']) >= today)
+    return habits.loc[due, columns].reset_index(drop=True)
+
+
+def build_log_features(df):
+    """
+    Add the derived columns the analytics views read to the merged logs.
+    goal_achievement is the activity value as a percentage of the goal, capped at 100, for habits that are not Yes/No.
+    """
+    if df.empty:
+        return df
+    is_goal_tracked = df['tracking_type'] != "Yes/No (Completed or not)"
+    goal_achievement = ((df['value'] / df['goal'].astype(float)) * 100).clip(upper=100).where(is_goal_tracked)
+    return df.assign(goal_achievement=goal_achievement)
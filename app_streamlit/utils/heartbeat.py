@@ -0,0 +1,59 @@
+"""
+Heartbeat Module
+
+This module keeps the Supabase project active by pinging the probe table from a background thread.
+The ping runs at most once per interval per process and never blocks page reruns.
+"""
+import os
+import threading
+import time
+
+# seconds between pings
+HEARTBEAT_INTERVAL = int(os.environ.get("HEARTBEAT_INTERVAL", 3600))
+
+# results of the most recent pings
+metrics = {
+    "last_success_at": None,
+    "last_latency_ms": None,
+    "last_error": None,
+    "failures": 0
+}
+_lock = threading.Lock()
+_thread = None
+
+
+def ping(client):
+    """Query a single row from the probe table and record the latency"""
+    start = time.perf_counter()
+    try:
+        client.table('probe_action').select('*').limit(1).execute()
+    except Exception as e:
+        with _lock:
+            metrics["last_error"] = str(e)
+            metrics["failures"] += 1
+        print(f"Error keeping Supabase connection alive: {e}")
+        return False
+    with _lock:
+        metrics["last_success_at"] = time.time()
+        metrics["last_latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        metrics["last_error"] = None
+    return True
+
+def _run(client, interval):
+    """Ping the probe table forever, once per interval"""
+    while True:
+        ping(client)
+        time.sleep(interval)
+
+def start_heartbeat(client, interval=HEARTBEAT_INTERVAL):
+    """Start the heartbeat thread once per process"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(client, interval), name="supabase-heartbeat", daemon=True)
+            _thread.start()
+
+def get_heartbeat_metrics():
+    """Get the latency and status of the most recent pings"""
+    with _lock:
+        return dict(metrics)
@@ -0,0 +1,86 @@
+"""
+Image Cache Module
+
+This module keeps rendered matplotlib figures, such as the log calendar and the word cloud, as PNG bytes.
+Images are keyed by (user, filter selection, data version), so a figure is drawn once and served on later reruns.
+Figures are closed as soon as they are rendered, and the least recently used images are dropped
+once the images in the process take up more than MAX_BYTES.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+import matplotlib.pyplot as plt
+from app_streamlit.utils import cache_bus as bus
+
+# bytes of PNG data kept per process
+MAX_BYTES = int(os.environ.get("IMAGE_CACHE_BYTES", 64 * 1024 * 1024))
+
+_lock = threading.RLock()
+# key -> PNG bytes, least recently used first
+_images = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "bytes": 0}
+
+
+def figure_to_png(fig, dpi=100):
+    """Render a figure to PNG bytes and close it"""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+def _drop(key):
+    """Drop a cached image, the lock must be held"""
+    _stats["bytes"] -= len(_images.pop(key))
+    _stats["evictions"] += 1
+
+def get_cached_image(key):
+    """Get the PNG bytes cached under key, None when the image has not been rendered yet"""
+    with _lock:
+        png = _images.get(key)
+        if png is not None:
+            _images.move_to_end(key)
+            _stats["hits"] += 1
+        return png
+
+def get_image(key, render):
+    """
+    Get the PNG bytes cached under key, calling render() for a new figure on a miss.
+    key is a tuple starting with the user id, e.g. (user_id, filters, data_version).
+    """
+    png = get_cached_image(key)
+    if png is not None:
+        return png
+    with _lock:
+        _stats["misses"] += 1
+    png = figure_to_png(render())
+    with _lock:
+        if key in _images:
+            _drop(key)
+        # images larger than the whole budget are served but not kept
+        if len(png) <= MAX_BYTES:
+            _images[key] = png
+            _stats["bytes"] += len(png)
+            # drop the least recently used images
+            while _stats["bytes"] > MAX_BYTES:
+                _drop(next(iter(_images)))
+        _stats["size"] = len(_images)
+    return png
+
+def evict_user(user_id, table=None):
+    """Drop the cached images of a user"""
+    with _lock:
+        for key in [key for key in _images if key[0] == user_id]:
+            _drop(key)
+        _stats["size"] = len(_images)
+
+# images of a user are out of date once their habits or logs change
+bus.subscribe("habits", evict_user)
+bus.subscribe("activity_logs", evict_user)
+
+def get_image_cache_stats():
+    """Get the hit, miss, eviction, size and byte counters of the image cache"""
+    with _lock:
+        return dict(_stats)
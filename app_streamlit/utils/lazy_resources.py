@@ -0,0 +1,99 @@
+"""
+Lazy Resources Module
+
+This module loads the heavy libraries used by the notes and calendar visuals (nltk, wordcloud, calplot) on first use.
+A background thread can warm them up after startup so the first analytics render does not pay for them.
+"""
+import os
+import threading
+import time
+
+# warm up heavy resources in a background thread after startup
+WARM_START = os.environ.get("WARM_START", "true").lower() in ("1", "true", "yes")
+
+# nltk resources needed for sentiment analysis
+NLTK_RESOURCES = [
+    ('tokenizers/punkt_tab', 'punkt_tab'),
+    ('sentiment/vader_lexicon.zip', 'vader_lexicon'),
+    ('corpora/stopwords', 'stopwords'),
+    ('corpora/wordnet', 'wordnet')
+]
+
+# seconds spent loading each resource
+timings = {}
+_modules = {}
+_locks = {name: threading.Lock() for name in ('nltk', 'wordcloud', 'calplot')}
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+
+def _load(name, loader):
+    """Run a loader once per process and record how long it took"""
+    with _locks[name]:
+        if name not in _modules:
+            start = time.perf_counter()
+            _modules[name] = loader()
+            timings[name] = round(time.perf_counter() - start, 3)
+        return _modules[name]
+
+def _download_nltk_resources():
+    """Download missing nltk resources"""
+    import nltk
+    for resource_path, download_name in NLTK_RESOURCES:
+        try:
+            nltk.data.find(resource_path)
+        except (LookupError, ImportError):
+            try:
+                nltk.download(download_name, quiet=True)
+            except Exception:
+                # older nltk versions ship punkt instead of punkt_tab
+                if download_name == 'punkt_tab':
+                    nltk.download('punkt', quiet=True)
+    return nltk
+
+def get_nltk():
+    """Get nltk with its resources downloaded"""
+    return _load('nltk', _download_nltk_resources)
+
+def get_wordcloud():
+    """Get the WordCloud class"""
+    def loader():
+        from wordcloud import WordCloud
+        return WordCloud
+    return _load('wordcloud', loader)
+
+def get_calplot():
+    """Get the calplot module"""
+    def loader():
+        import calplot
+        return calplot
+    return _load('calplot', loader)
+
+def _warmup():
+    """Load all heavy resources and print a timing report"""
+    start = time.perf_counter()
+    for loader in (get_nltk, get_wordcloud, get_calplot):
+        try:
+            loader()
+        except Exception as e:
+            print(f"Error warming up resources: {e}")
+    print(f"Resource warm-up finished in {time.perf_counter() - start:.2f}s: {get_timing_report()}")
+
+def start_warmup():
+    """Start the background warm-up thread once per process if warm start is enabled"""
+    global _warmup_thread
+    if not WARM_START:
+        return False
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warmup, name="resource-warmup", daemon=True)
+            _warmup_thread.start()
+    return True
+
+def is_warm():
+    """Check if all heavy resources have been loaded"""
+    return all(name in _modules for name in ('nltk', 'wordcloud', 'calplot'))
+
+def get_timing_report():
+    """Get the load time in seconds for each resource loaded so far"""
+    return dict(timings)
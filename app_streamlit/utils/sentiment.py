@@ -0,0 +1,94 @@
+"""
+Sentiment Module
+
+This module scores log notes with the VADER sentiment analyzer.
+It has no Streamlit dependencies so that large batches can be scored in worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pandas as pd
+
+# nltk resources, built once per process
+_stop_words = None
+_lemmatizer = None
+_analyzer = None
+
+# notes per worker task
+CHUNK_SIZE = 2000
+# batches with at least this many unique notes are scored in worker processes
+PARALLEL_THRESHOLD = 5000
+
+
+def _load_resources():
+    """Build the stopword set, lemmatizer and analyzer if they do not exist yet"""
+    global _stop_words, _lemmatizer, _analyzer
+    if _analyzer is None:
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        _stop_words = set(stopwords.words('english'))
+        _lemmatizer = WordNetLemmatizer()
+        _analyzer = SentimentIntensityAnalyzer()
+
+def tokenize_text(text):
+    """Tokenizes text, removes stopwords and lemmatizes the remaining tokens"""
+    from nltk.tokenize import word_tokenize
+    _load_resources()
+    # tokenize text
+    tokens = word_tokenize(text.lower())
+    # remove stopwords and lemmatize
+    return [_lemmatizer.lemmatize(token) for token in tokens if token not in _stop_words]
+
+def preprocess_text(text):
+    """Preprocesses text for sentiment analysis"""
+    return ' '.join(tokenize_text(text))
+
+def sentiment_label(scores):
+    """Classifies a compound score as positive, negative or neutral"""
+    # criteria for sentiment classification
+    if scores >= 0.05:
+        return 'positive'
+    elif scores <= -0.05:
+        return 'negative'
+    else:
+        return 'neutral'
+
+def _score_chunk(texts):
+    """Get compound scores for a list of notes"""
+    _load_resources()
+    return [_analyzer.polarity_scores(preprocess_text(text))['compound'] for text in texts]
+
+def _score_parallel(texts, chunk_size, max_workers):
+    """Score notes in chunks across worker processes"""
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    scores = []
+    # spawn fresh workers, forking the threaded Streamlit server can deadlock on locks held by other threads
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for chunk_scores in executor.map(_score_chunk, chunks):
+            scores.extend(chunk_scores)
+    return scores
+
+def score_notes(notes, chunk_size=CHUNK_SIZE, max_workers=None, parallel_threshold=PARALLEL_THRESHOLD):
+    """
+    Score a batch of notes.
+    Identical notes are only scored once and large batches are split across worker processes.
+    Returns a DataFrame with 'sentiment' and 'compound' columns aligned to the input index.
+    """
+    notes = pd.Series(notes, dtype=object).fillna('').astype(str)
+    unique_notes = list(notes.unique())
+    if not unique_notes:
+        return pd.DataFrame({'sentiment': pd.Series(dtype=object), 'compound': pd.Series(dtype=float)}, index=notes.index)
+    if len(unique_notes) >= parallel_threshold:
+        try:
+            scores = _score_parallel(unique_notes, chunk_size, max_workers)
+        except (OSError, RuntimeError) as e:
+            # fall back to scoring in this process
+            print(f"Error scoring notes in worker processes: {e}")
+            scores = _score_chunk(unique_notes)
+    else:
+        scores = _score_chunk(unique_notes)
+    compound = notes.map(dict(zip(unique_notes, scores)))
+    return pd.DataFrame({
+        'sentiment': compound.map(sentiment_label),
+        'compound': compound
+    }, index=notes.index)
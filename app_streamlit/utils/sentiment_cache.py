@@ -0,0 +1,75 @@
+"""
+Sentiment Cache Module
+
+This module stores sentiment results for log notes in a local SQLite database.
+Notes are keyed by a hash of their text so each note is only scored once.
+"""
+import sqlite3
+import hashlib
+import os
+
+# cache db path, in the data folder at the repository root wherever the app is started from
+cache_db = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'sentiment_cache.db')
+
+# sqlite limits the number of parameters in one query
+MAX_QUERY_PARAMS = 900
+
+
+def note_hash(text):
+    """Get the hash used as the cache key for a note"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _connect():
+    """Connect to the cache db, creating it if needed"""
+    os.makedirs(os.path.dirname(cache_db), exist_ok=True)
+    conn = sqlite3.connect(cache_db)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS note_sentiments(
+                   note_hash TEXT PRIMARY KEY,
+                   sentiment TEXT NOT NULL,
+                   compound REAL NOT NULL,
+                   created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                   )
+    """)
+    return conn
+
+def get_cached_sentiments(hashes):
+    """Get cached sentiment and compound score for the given note hashes"""
+    hashes = list(hashes)
+    results = {}
+    if not hashes:
+        return results
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        # query in chunks to stay below the parameter limit
+        for i in range(0, len(hashes), MAX_QUERY_PARAMS):
+            chunk = hashes[i:i + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"""
+                SELECT note_hash, sentiment, compound
+                FROM note_sentiments
+                WHERE note_hash IN ({placeholders})
+            """, chunk)
+            for hash_key, sentiment, compound in cursor.fetchall():
+                results[hash_key] = (sentiment, compound)
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error reading sentiment cache: {e}")
+    return results
+
+def save_sentiments(rows):
+    """Save (note_hash, sentiment, compound) rows to the cache"""
+    if not rows:
+        return
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO note_sentiments(note_hash, sentiment, compound)
+            VALUES (?,?,?)
+        """, rows)
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error saving sentiment cache: {e}")
@@ -1,83 +1,374 @@
 import pandas as pd
 import streamlit as st
+from datetime import date
 from supabase import create_client, Client
-from datetime import date, timedelta
+from app_streamlit.utils.habit_metrics import build_daily_rollup, calculate_due_habits
+from app_streamlit.utils import cache_bus as bus
 
 
+# http connection pool shared by all sessions
+POOL_LIMITS = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60
+}
+
 # initialize supabase client
+@st.cache_resource
 def init_supabase():
+    """Create one Supabase client per process, shared by all sessions.
+    
+    The client keeps its HTTP connections alive so reruns reuse them instead of opening new ones."""
     url=st.secrets["SUPABASE_URL"]
     key=st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
+    try:
+        import httpx
+        from supabase import ClientOptions
+        http_client = httpx.Client(limits=httpx.Limits(**POOL_LIMITS), timeout=30)
+        try:
+            return create_client(url, key, options=ClientOptions(httpx_client=http_client))
+        except TypeError:
+            http_client.close()
+            raise
+    except (ImportError, TypeError):
+        # older supabase versions do not accept a custom http client
+        return create_client(url, key)
+
+# columns of the due habit index maintained by the database
+DUE_HABIT_COLUMNS = ["habit_id", "name", "frequency", "last_logged_at", "next_due_date"]
+
+# columns the dashboard views need, notes are fetched separately with get_log_notes
+HABIT_COLUMNS = ["habit_id", "name", "start_date", "frequency", "category", "tracking_type", "goal", "goal_units", "end_date"]
+LOG_COLUMNS = ["log_id", "habit_id", "log_date", "activity", "completed", "value", "rating"]
+# columns of the daily rollup maintained by the database
+ROLLUP_COLUMNS = ["habit_id", "log_date", "log_count", "activity_sum", "rating_sum"]
+
+# dtypes applied to fetched data
+DATE_COLUMNS = ["start_date", "end_date", "log_date", "last_logged_at", "next_due_date"]
+CATEGORY_COLUMNS = ["category", "frequency", "tracking_type"]
+# rating is nullable, so it uses the nullable small int dtype
+TYPED_COLUMNS = {"rating": "Int8", "value": "float64", "completed": "bool"}
+
+# rows per request, must not exceed the PostgREST max-rows setting (1000 by default)
+PAGE_SIZE = 1000
+
+# per-user data cache held in session state
+def _get_data_cache():
+    """Return the per-user data cache, creating it on first use."""
+    if 'data_cache' not in st.session_state:
+        st.session_state.data_cache = {}
+    return st.session_state.data_cache
+
+def _max_id(df, col):
+    """Return the largest id in a column, or 0 if there are no rows."""
+    if df.empty or col not in df.columns:
+        return 0
+    return int(df[col].max())
+
+def _apply_types(df):
+    """Parse dates, store repeated labels as categories, ratings as small ints and activity values as numbers."""
+    if df.empty:
+        return df
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col, dtype in TYPED_COLUMNS.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def _iter_pages(make_query, id_col, watermark=None, page_size=None):
+    """Yield rows page by page, ordered by id_col, so no response is cut off by the server row limit.
+    
+    make_query returns a new filtered query for each page, pages continue after the last id seen."""
+    page_size = page_size or PAGE_SIZE
+    last_id = watermark
+    while True:
+        query = make_query()
+        if last_id is not None:
+            query = query.gt(id_col, last_id)
+        rows = query.order(id_col).limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+        # the server may cap pages below page_size, so only an empty page ends the loop
+        last_id = rows[-1][id_col]
+
+def _iter_frames(supabase, table, columns, user_id, id_col, watermark=None):
+    """Yield a user's rows as typed DataFrame pages, optionally only ids above a watermark."""
+    make_query = lambda: supabase.table(table).select(", ".join(columns)).eq("user_id", user_id)
+    for rows in _iter_pages(make_query, id_col, watermark):
+        yield _apply_types(pd.DataFrame(rows))
+
+def _fetch(supabase, table, columns, user_id, id_col, watermark=None):
+    """Fetch the given columns of all of a user's rows as a typed DataFrame."""
+    frames = list(_iter_frames(supabase, table, columns, user_id, id_col, watermark))
+    if not frames:
+        return pd.DataFrame()
+    return _concat(frames)
+
+def _concat(frames):
+    """Concatenate typed frames and restore the dtypes pandas drops when categories differ."""
+    return _apply_types(pd.concat(frames, ignore_index=True))
+
+def _merge_logs(activities_df, habits_df):
+    """Merge activity logs with their habits."""
+    return pd.merge(activities_df, habits_df, on='habit_id', how='left')
+
+def invalidate_data_cache(user_id, full=False):
+    """Mark cached user data as stale so the next get_data call syncs new rows.
+    
+    With full=True the cached frames are dropped and the next call reloads everything."""
+    cache = _get_data_cache()
+    if user_id not in cache:
+        return
+    if full:
+        del cache[user_id]
+    else:
+        cache[user_id]['stale'] = True
+
+def _on_write(user_id, table):
+    """Sync the session's cached data after a write to habits or activity logs."""
+    invalidate_data_cache(user_id)
+    if table == "habits":
+        invalidate_habit_catalog(user_id)
+
+bus.subscribe("habits", _on_write)
+bus.subscribe("activity_logs", _on_write)
+
+def _load_user_data(supabase, user_id, progress=None):
+    """Download the habits and activity logs a user's dashboard needs into a new cache entry.
+    
+    Logs are fetched page by page and each page is merged with the habits as it arrives.
+    progress is called with the number of logs loaded so far after each page."""
+    habits_df = _fetch(supabase, "habits", HABIT_COLUMNS, user_id, "habit_id")
+    log_pages = []
+    merged_pages = []
+    for page in _iter_frames(supabase, "activity_logs", LOG_COLUMNS, user_id, "log_id"):
+        log_pages.append(page)
+        if not habits_df.empty:
+            merged_pages.append(_merge_logs(page, habits_df))
+        if progress is not None:
+            progress(sum(len(log_page) for log_page in log_pages))
+    activities_df = _concat(log_pages) if log_pages else pd.DataFrame()
+    merged_df = _concat(merged_pages) if merged_pages else pd.DataFrame()
+    return {
+        'habits': habits_df,
+        'activities': activities_df,
+        'merged': merged_df,
+        'daily_rollup': None,
+        'habit_watermark': _max_id(habits_df, 'habit_id'),
+        'log_watermark': _max_id(activities_df, 'log_id'),
+        'notes': None,
+        'notes_watermark': 0,
+        'habit_catalog': None,
+        'stale': False
+    }
+
+def _sync_user_data(supabase, user_id, entry):
+    """Pull only habits and logs newer than the cached watermarks and append them."""
+    new_habits_df = _fetch(supabase, "habits", HABIT_COLUMNS, user_id, "habit_id", entry['habit_watermark'])
+    new_logs_df = _fetch(supabase, "activity_logs", LOG_COLUMNS, user_id, "log_id", entry['log_watermark'])
+    # append new habits
+    if not new_habits_df.empty:
+        entry['habits'] = _concat([entry['habits'], new_habits_df])
+        entry['habit_watermark'] = _max_id(entry['habits'], 'habit_id')
+        # rebuild the habit catalog with the new habits on next use
+        entry['habit_catalog'] = None
+    # append new logs and merge only those rows
+    if not new_logs_df.empty:
+        entry['activities'] = _concat([entry['activities'], new_logs_df])
+        entry['log_watermark'] = _max_id(entry['activities'], 'log_id')
+        # refetch only the rollup days the new logs were added to
+        if entry['daily_rollup'] is not None:
+            since = new_logs_df['log_date'].min().normalize()
+            rollup = entry['daily_rollup']
+            entry['daily_rollup'] = pd.concat([rollup[rollup['log_date'] < since],
+                                               _fetch_daily_rollup(supabase, user_id, since)], ignore_index=True)
+    habits_df = entry['habits']
+    activities_df = entry['activities']
+    if habits_df.empty or activities_df.empty:
+        entry['merged'] = pd.DataFrame()
+    elif entry['merged'].empty:
+        entry['merged'] = _merge_logs(activities_df, habits_df)
+    elif not new_logs_df.empty:
+        new_merged = _merge_logs(new_logs_df, habits_df)
+        entry['merged'] = _concat([entry['merged'], new_merged])
+    entry['stale'] = False
+    return entry
 
 # function to get user data
-# @st.cache_data
 def get_data(user_id):
-    """Fetch user data from the database."""
+    """Fetch user data from the database.
+    
+    Data is cached per user and only rows newer than the last sync are fetched
+    after a write has marked the cache as stale. Only the columns in HABIT_COLUMNS
+    and LOG_COLUMNS are fetched, log notes are loaded with get_log_notes."""
     # get supabase client
-    supabase = st.session_state.supabase
+    supabase = init_supabase()
     if user_id is None:
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-    habits =  supabase.table("habits").select("*").eq("user_id", user_id).execute()
-    activities = supabase.table("activity_logs").select("*").eq("user_id", user_id).execute()
-    habits_df = pd.DataFrame(habits.data)
-    activities_df = pd.DataFrame(activities.data)
-    if habits_df.empty or activities_df.empty:
-        return habits_df, activities_df, pd.DataFrame()
-    else:
-        merged_df = pd.merge(activities_df, habits_df, on='habit_id', how='left')
-        merged_df['log_date'] = pd.to_datetime(merged_df['log_date'])
-        # merged_df.drop(columns='name_y', inplace=True)
-        # merged_df.rename(columns={'name_x':'name'}, inplace=True)
-        return habits_df, activities_df, merged_df
+    cache = _get_data_cache()
+    entry = cache.get(user_id)
+    if entry is None:
+        # show how many logs have loaded for users with long histories
+        status = st.empty()
+        entry = _load_user_data(supabase, user_id,
+                                progress=lambda rows: status.caption(f"Loading activity logs... {rows:,} loaded"))
+        status.empty()
+        cache[user_id] = entry
+    elif entry['stale']:
+        entry = _sync_user_data(supabase, user_id, entry)
+    return entry['habits'], entry['activities'], entry['merged']
+
+# get log notes only when a view needs them
+def get_log_notes(user_id):
+    """Fetch the user's log notes as a Series indexed by log id.
+    
+    Notes are downloaded on first use and only notes for newer logs are fetched afterwards."""
+    supabase = init_supabase()
+    if user_id is None:
+        return pd.Series(dtype=object, name='log_notes')
+    get_data(user_id)
+    entry = _get_data_cache()[user_id]
+    if entry['notes'] is None or entry['notes_watermark'] < entry['log_watermark']:
+        watermark = entry['notes_watermark'] if entry['notes'] is not None else None
+        notes_df = _fetch(supabase, "activity_logs", ["log_id", "log_notes"], user_id, "log_id", watermark)
+        if notes_df.empty:
+            new_notes = pd.Series(dtype=object, name='log_notes')
+        else:
+            new_notes = notes_df.set_index('log_id')['log_notes'].fillna('')
+        entry['notes'] = new_notes if entry['notes'] is None else pd.concat([entry['notes'], new_notes])
+        entry['notes_watermark'] = max(entry['notes_watermark'], _max_id(notes_df, 'log_id'))
+    return entry['notes']
+
+def _fetch_daily_rollup(supabase, user_id, since=None):
+    """Fetch a user's rows of the activity_daily_rollup table, optionally only days from since on.
     
+    Rollup rows have no single id column, so pages are read by offset in (log_date, habit_id) order."""
+    frames = []
+    start = 0
+    while True:
+        query = supabase.table("activity_daily_rollup").select(", ".join(ROLLUP_COLUMNS)).eq("user_id", str(user_id))
+        if since is not None:
+            query = query.gte("log_date", since.strftime('%Y-%m-%d'))
+        rows = query.order("log_date").order("habit_id").range(start, start + PAGE_SIZE - 1).execute().data
+        # the server may cap pages below PAGE_SIZE, so only an empty page ends the loop
+        if not rows:
+            break
+        frames.append(pd.DataFrame(rows))
+        start += len(rows)
+    if not frames:
+        return build_daily_rollup(pd.DataFrame())
+    rollup = pd.concat(frames, ignore_index=True)
+    rollup['log_date'] = pd.to_datetime(rollup['log_date'])
+    rollup['activity_sum'] = rollup['activity_sum'].astype(float)
+    return rollup[ROLLUP_COLUMNS]
+
+# get the daily rollup of activity logs
+def get_daily_rollup(user_id):
+    """Fetch log count, activity sum and rating sum per habit per day from the activity_daily_rollup table.
+    
+    The rollup is fetched on first use, and each sync refetches only the days new logs were added to."""
+    supabase = init_supabase()
+    if user_id is None:
+        return build_daily_rollup(pd.DataFrame())
+    get_data(user_id)
+    entry = _get_data_cache()[user_id]
+    if entry['daily_rollup'] is None:
+        entry['daily_rollup'] = _fetch_daily_rollup(supabase, user_id)
+    return entry['daily_rollup']
+
+# version of the cached user data
+def get_data_version(user_id):
+    """Get the habit and log watermarks of the cached user data.
+    
+    Habits and logs are only ever appended, so the version changes whenever the data does."""
+    if user_id is None:
+        return None
+    get_data(user_id)
+    entry = _get_data_cache()[user_id]
+    return (entry['habit_watermark'], entry['log_watermark'])
+
+# rebuild the daily rollup after a backfill
+def rebuild_daily_rollup(user_id):
+    """Rebuild the user's daily rollup table in the database and reload the cached data."""
+    supabase = init_supabase()
+    if user_id is None:
+        return False
+    supabase.rpc("rebuild_activity_daily_rollup", {"p_user_id": str(user_id)}).execute()
+    invalidate_data_cache(user_id, full=True)
+    return True
+    
+
+def _build_habit_catalog(habits_df):
+    """Build a category -> habit name -> habit id and tracking type lookup from the habits frame."""
+    catalog = {}
+    if habits_df.empty:
+        return catalog
+    for habit in habits_df[['habit_id', 'name', 'category', 'tracking_type']].itertuples(index=False):
+        if pd.isna(habit.category):
+            continue
+        catalog.setdefault(habit.category, {})[habit.name] = {
+            "habit_id": int(habit.habit_id),
+            "tracking_type": habit.tracking_type
+        }
+    return catalog
+
+def invalidate_habit_catalog(user_id):
+    """Drop the cached habit catalog so it is rebuilt with new habits on next use."""
+    entry = _get_data_cache().get(user_id)
+    if entry is not None:
+        entry['habit_catalog'] = None
+
+# get habit catalog
+def get_habit_catalog(user_id):
+    """Fetch the user's habits grouped by category with their ids and tracking types.
+    
+    The catalog is built once from the cached habits and reused until a habit is created."""
+    if user_id is None:
+        return {}
+    get_data(user_id)
+    entry = _get_data_cache()[user_id]
+    if entry['habit_catalog'] is None:
+        entry['habit_catalog'] = _build_habit_catalog(entry['habits'])
+    return entry['habit_catalog']
 
 # get distinct categories
-@st.cache_data
 def get_categories(user_id):
-    """Fetch distinct categories from the database."""
-    # get supabase client
-    supabase = st.session_state.supabase
-    if user_id is None:
-        return []
-    categories = supabase.table("habits").select("category").eq("user_id", user_id).execute()
-    categories_df = pd.DataFrame(categories.data)
-    return categories_df['category'].dropna().unique().tolist()
+    """Fetch distinct categories from the habit catalog."""
+    return list(get_habit_catalog(user_id))
 
 # get distinct habits for a category
-@st.cache_data 
 def get_habits(user_id, category):
-    """Fetch distinct habits and tracking types for a category from the database."""
-    supabase = st.session_state.supabase
-    if user_id is None or category is None:
-        return {}
-    habits = supabase.table("habits").select("name, tracking_type").eq("user_id", user_id).eq("category", category).execute()
-    habits_df = pd.DataFrame(habits.data)
-    if habits_df.empty:
+    """Fetch distinct habits and tracking types for a category from the habit catalog."""
+    if category is None:
         return {}
-    return dict(zip(habits_df["name"], habits_df["tracking_type"]))
+    habits = get_habit_catalog(user_id).get(category, {})
+    return {name: habit["tracking_type"] for name, habit in habits.items()}
 
 
 # get habit id
-@st.cache_data
-def get_habit_id(user_id, habit_name):
-    """Fetch habit id for a habit name from the database."""
-    # get supabase client
-    supabase = st.session_state.supabase
-    if user_id is None or habit_name is None:
-        return None
-    habit = supabase.table("habits").select("habit_id").eq("user_id", user_id).eq("name", habit_name).execute()
-    habit_df = pd.DataFrame(habit.data)
-    if not habit_df.empty:
-        return habit_df['habit_id'].values[0]
-    else:
+def get_habit_id(user_id, habit_name, category=None):
+    """Fetch habit id for a habit name from the habit catalog."""
+    if habit_name is None:
         return None
+    catalog = get_habit_catalog(user_id)
+    categories = [category] if category is not None else list(catalog)
+    for category in categories:
+        habit = catalog.get(category, {}).get(habit_name)
+        if habit is not None:
+            return habit["habit_id"]
+    return None
     
 # insert activity log
 def insert_activity_log(user_id, habit_id, log_date, activity, rating, log_notes):
     """Insert activity log into the database."""
     # get supabase client
-    supabase = st.session_state.supabase
+    supabase = init_supabase()
     if user_id is None or habit_id is None:
         return False
     data = {
@@ -90,15 +381,37 @@ def insert_activity_log(user_id, habit_id, log_date, activity, rating, log_notes
     }
     response = supabase.table("activity_logs").insert(data).execute()
     if response.data:
+        bus.publish(user_id, "activity_logs")
         return True
     else:
         return False
     
+# get habits for bulk imports
+def get_habit_lookup(user_id):
+    """Fetch the id, name, category and tracking type of all of the user's habits, including uncategorized ones."""
+    habits_df = get_data(user_id)[0]
+    if habits_df.empty:
+        return pd.DataFrame(columns=["habit_id", "name", "category", "tracking_type"])
+    return habits_df[["habit_id", "name", "category", "tracking_type"]]
+
+# insert many activity logs
+def insert_activity_logs(user_id, rows):
+    """Insert a batch of activity logs into the database in one request."""
+    supabase = init_supabase()
+    if user_id is None:
+        raise ValueError("A user is required to import activity logs.")
+    data = [dict(row, user_id=user_id) for row in rows]
+    response = supabase.table("activity_logs").insert(data).execute()
+    if not response.data:
+        raise RuntimeError("No activity logs were inserted.")
+    bus.publish(user_id, "activity_logs")
+    return len(response.data)
+    
 # insert habit
 def insert_habit(user_id, name, start_date, frequency, tracking_type, goal, goal_units, category, notes, end_date=None):
     """Insert habit into the database."""
     # get supabase client
-    supabase = st.session_state.supabase
+    supabase = init_supabase()
     if user_id is None:
         return False
     data = {
@@ -115,59 +428,38 @@ def insert_habit(user_id, name, start_date, frequency, tracking_type, goal, goal
     }
     response = supabase.table("habits").insert(data).execute()
     if response.data:
+        bus.publish(user_id, "habits")
         return True
     else:
         return False
     
-# get unlogged activities
-def get_unlogged_activities(user_id):
-    """Fetch activities that are due for the user."""
-    # get supabase client
-    supabase = st.session_state.supabase
+# get habits that are due
+def get_due_habits(user_id, habits_df=None, logs_df=None):
+    """Fetch habits that have not been logged in their current period and have not ended.
+    
+    Without frames this is a range query on the next_due_date index, which the database
+    updates whenever an activity is logged. Pass habits and logs already loaded with
+    get_data to compute the same result in memory instead."""
     if user_id is None:
-        return [], [], []
-    # today
-    today = date.today()
-    # convert to iso format
-    today_iso = today.isoformat()
-    # start of the week
-    start_of_week = today - timedelta(days=today.weekday())
-    # start of the month
-    start_of_month = today.replace(day=1)
-    # get all habits
-    habits = supabase.table("habits").select("*").eq("user_id", user_id).execute().data
-    # if no habits, return empty lists
-    if not habits:
-        return [], [], []
-    # get all activities for this month
-    recent_logs = supabase.table("activity_logs")\
-        .select("*")\
+        return calculate_due_habits(pd.DataFrame(), pd.DataFrame())
+    if habits_df is not None and logs_df is not None:
+        return calculate_due_habits(habits_df, logs_df)
+    return _fetch_due_habits(user_id, date.today().isoformat())
+
+@bus.cached(["habits", "activity_logs"])
+def _fetch_due_habits(user_id, today):
+    """Query the habits whose next due date is on or before today and that have not ended."""
+    supabase = init_supabase()
+    make_query = lambda: supabase.table("habits").select(", ".join(DUE_HABIT_COLUMNS))\
         .eq("user_id", user_id)\
-        .gte("log_date", start_of_month)\
-        .execute()\
-        .data
-    # list to hold unlogged activities
-    daily_activities = []
-    weekly_activities = []
-    monthly_activities = []
-    # loop through habits
-    for habit in habits:
-        # get habit details
-        habit_id = habit['habit_id']
-        habit_name = habit['name']
-        habit_frequency = habit['frequency']
-        if habit_frequency == "Daily":
-            # check if activity is logged for today
-            if not any(log['habit_id'] == habit_id and log['log_date'] == today_iso for log in recent_logs):
-                daily_activities.append(habit_name)
-        elif habit_frequency == "Weekly":
-            # check if activity is logged for this week
-            if not any(log['habit_id'] == habit_id and log['log_date'] >= start_of_week.isoformat() for log in recent_logs):
-                weekly_activities.append(habit_name)
-        elif habit_frequency == "Monthly":
-            # check if activity is logged for this month
-            if not any(log['habit_id'] == habit_id and log['log_date'] >= start_of_month.isoformat() for log in recent_logs):
-                monthly_activities.append(habit_name)
-    # return activities
-    return daily_activities, weekly_activities, monthly_activities
+        .lte("next_due_date", today)\
+        .or_(f"end_date.is.null,end_date.gte.{today}")
+    due_habits = [habit for page in _iter_pages(make_query, "habit_id") for habit in page]
+    return _apply_types(pd.DataFrame(due_habits, columns=DUE_HABIT_COLUMNS))
 
+# get unlogged activities
+def get_unlogged_activities(user_id, habits_df=None, logs_df=None):
+    """Fetch the names of daily, weekly and monthly habits that are due for the user."""
+    due_habits = get_due_habits(user_id, habits_df, logs_df)
+    return tuple(due_habits.loc[due_habits['frequency'] == frequency, 'name'].tolist()
+                 for frequency in ("Daily", "Weekly", "Monthly"))
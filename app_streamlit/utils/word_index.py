@@ -0,0 +1,175 @@
+"""
+Word Index Module
+
+This module keeps the word frequencies of log notes per log and per habit, so word clouds are drawn
+from counts instead of joining and re-tokenizing every note on each render.
+Notes go through the same stopword and lemmatization pipeline as sentiment analysis.
+The word counts of each note are stored in a local SQLite database keyed by a hash of the note,
+so a note is only tokenized once, and each user's index is shared by all sessions of the process.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+import pandas as pd
+from app_streamlit.utils import lazy_resources as lr
+from app_streamlit.utils.sentiment import tokenize_text
+from app_streamlit.utils.sentiment_cache import note_hash
+
+# cache db path, in the data folder at the repository root wherever the app is started from
+cache_db = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'word_index.db')
+
+# sqlite limits the number of parameters in one query
+MAX_QUERY_PARAMS = 900
+# user indexes kept per process
+MAX_USERS = int(os.environ.get("WORD_INDEX_USERS", 64))
+
+_lock = threading.RLock()
+# user id -> word index, least recently used first
+_indexes = OrderedDict()
+
+
+def count_words(text):
+    """Count the words in a note, skipping punctuation and single letters"""
+    if not isinstance(text, str) or not text.strip():
+        return Counter()
+    return Counter(token for token in tokenize_text(text) if token.isalpha() and len(token) > 1)
+
+def _connect():
+    """Connect to the cache db, creating it if needed"""
+    os.makedirs(os.path.dirname(cache_db), exist_ok=True)
+    conn = sqlite3.connect(cache_db)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS note_words(
+                   note_hash TEXT PRIMARY KEY,
+                   counts TEXT NOT NULL,
+                   created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                   )
+    """)
+    return conn
+
+def get_cached_counts(hashes):
+    """Get the cached word counts for the given note hashes"""
+    hashes = list(hashes)
+    results = {}
+    if not hashes:
+        return results
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        # query in chunks to stay below the parameter limit
+        for i in range(0, len(hashes), MAX_QUERY_PARAMS):
+            chunk = hashes[i:i + MAX_QUERY_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"""
+                SELECT note_hash, counts
+                FROM note_words
+                WHERE note_hash IN ({placeholders})
+            """, chunk)
+            for hash_key, counts in cursor.fetchall():
+                results[hash_key] = Counter(json.loads(counts))
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error reading word index cache: {e}")
+    return results
+
+def save_counts(rows):
+    """Save (note_hash, word counts) rows to the cache"""
+    if not rows:
+        return
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO note_words(note_hash, counts)
+            VALUES (?,?)
+        """, [(hash_key, json.dumps(counts)) for hash_key, counts in rows])
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error saving word index cache: {e}")
+
+def count_notes_cached(notes):
+    """Get the word counts of each note, only tokenizing notes that are not in the cache"""
+    notes = pd.Series(notes, dtype=object).fillna('').astype(str)
+    hashes = notes.map(note_hash)
+    # unique notes keyed by hash
+    unique_notes = dict(zip(hashes, notes))
+    counts = get_cached_counts(unique_notes.keys())
+    new_hashes = [hash_key for hash_key in unique_notes if hash_key not in counts]
+    # tokenize notes that have not been seen before
+    if new_hashes:
+        lr.get_nltk()
+        new_rows = [(hash_key, count_words(unique_notes[hash_key])) for hash_key in new_hashes]
+        save_counts(new_rows)
+        counts.update(new_rows)
+    return [counts[hash_key] for hash_key in hashes]
+
+def count_notes(notes):
+    """Count the words in a series of notes"""
+    counts = Counter()
+    for note_counts in count_notes_cached(pd.Series(notes, dtype=object).dropna()):
+        counts.update(note_counts)
+    return counts
+
+def build_word_index():
+    """Create an empty word index"""
+    return {
+        # log id -> word counts of its note
+        'logs': {},
+        # habit id -> word counts of all its indexed notes
+        'habits': {},
+        # habit id -> number of indexed logs
+        'habit_logs': Counter()
+    }
+
+def get_user_index(user_id):
+    """Get the word index of a user, creating it on first use"""
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = _indexes[user_id] = build_word_index()
+        _indexes.move_to_end(user_id)
+        # drop the least recently used indexes
+        while len(_indexes) > MAX_USERS:
+            _indexes.popitem(last=False)
+        return index
+
+def update_word_index(index, df, notes_col='log_notes'):
+    """
+    Add the logs in df that are not in the index yet.
+    Expects a DataFrame with 'log_id', 'habit_id' and notes_col columns.
+    """
+    with _lock:
+        new_logs = df[~df['log_id'].isin(list(index['logs']))]
+    if new_logs.empty:
+        return index
+    log_counts = count_notes_cached(new_logs[notes_col])
+    with _lock:
+        logs = index['logs']
+        for log_id, habit_id, counts in zip(new_logs['log_id'], new_logs['habit_id'], log_counts):
+            # another session may have added the log in the meantime
+            if log_id in logs:
+                continue
+            logs[log_id] = counts
+            index['habit_logs'][habit_id] += 1
+            index['habits'].setdefault(habit_id, Counter()).update(counts)
+    return index
+
+def word_frequencies(index, df):
+    """
+    Get the word frequencies of the logs in df, which must all be in the index.
+    Habits with every indexed log in df are read from the per-habit counts.
+    """
+    frequencies = Counter()
+    if df.empty:
+        return frequencies
+    with _lock:
+        for habit_id, log_ids in df.groupby('habit_id', observed=True)['log_id']:
+            if len(log_ids) == index['habit_logs'][habit_id]:
+                frequencies.update(index['habits'][habit_id])
+            else:
+                for log_id in log_ids:
+                    frequencies.update(index['logs'][log_id])
+    return frequencies
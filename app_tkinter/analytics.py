@@ -3,19 +3,14 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import numpy as np
-import seaborn as sns
-import calplot
 from db import db_operations as db
+from app_streamlit.utils.habit_metrics import (calculate_streaks, calculate_expected_logs, calculate_completion_rate,
+                                               filter_daily_rollup, daily_log_counts, average_rating_by_habit,
+                                               goal_achievement_by_habit)
 import altair as alt
-# wordcloud
-from wordcloud import WordCloud
-from datetime import datetime, timedelta
-# sentiment analysis
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+# nltk, wordcloud and calplot are loaded on first use
+from app_streamlit.utils import lazy_resources as lr
+from app_streamlit.utils.sentiment import preprocess_text, sentiment_label
 # nltk.download(['vader_lexicon', 'punkt_tab', 'stopwords', 'wordnet'])
 
 # set page config
@@ -45,6 +40,8 @@ def load_data():
     return habit_df, activity_df,merged_df
 
 habit_df,activity_df, merged_df = load_data()
+# log counts per habit per day, kept up to date by the db
+daily_rollup = db.get_daily_rollup()
 merged_df['log_date'] = pd.to_datetime(merged_df['log_date'])
 
 def update_active_view():
@@ -59,50 +56,6 @@ if 'view_radio' not in st.session_state:
 # container for the main view selector
 view_container = st.container()
 
-# function to calculate streaks
-def calculate_streaks(dates, freq):
-    if len(dates) == 0:
-        return 0,0
-    dates = sorted(dates)
-    longest = current = 1
-    max_streak = 1
-
-    for i in range(1, len(dates)):
-        gap = (dates[i] - dates[i-1]).days
-        if (
-            (freq == 'Daily' and gap == 1) or
-            (freq == "Weekly" and gap <= 7) or
-            (freq == "Monthly" and (dates[i].month != dates[i-1].month and gap <= 31))
-        ):
-            current += 1
-            max_streak = max(max_streak, current)
-        else:
-            current = 1
-
-    today = pd.to_datetime("today").normalize()
-    days_since_last = (today - dates[-1]).days
-    is_still_active = (
-        (freq == "Daily" and days_since_last <= 1) or
-        (freq == "Weekly" and days_since_last <=7) or
-        (freq == "Monthly" and days_since_last <= 31)
-    )
-    current_streak = current if is_still_active else 0
-    return max_streak, current_streak
-
-def calculate_expected_logs(date, frequency):
-    today = pd.to_datetime("today").normalize()
-    date = pd.to_datetime(date)
-    # if frequency is daily, expected logs is days between start date and today
-    if frequency == "Daily":
-        expected_logs = max((today - date).days + 1, 1)
-    # if frequency is weekly, expected logs is weeks between start date and today
-    elif frequency == "Weekly":
-        expected_logs = max(((today - date).days // 7)+1,1)
-    # if frequency is monthly, expected logs is months between start date and today
-    elif frequency == "Monthly":
-        expected_logs = max(((today.year - date.year) * 12 + (today.month - date.month)) + 1, 1)
-    return expected_logs
-
 def plot_bar_chart(df, group_col, value_col, x_title, y_title):
     """Plots bar chart with altair"""
     chart = alt.Chart(df).mark_bar().encode(
@@ -174,10 +127,14 @@ def plot_line_chart(df, date_col, value_col, x_title, y_title, target_value=None
 
     return chart
 
-def plot_calplot(df, date_col, cmap='YlGn'):
+def plot_calplot(df, date_col, cmap='YlGn', daily_rollup=None):
     """Plots a calendar plot"""
-    cal_data = df.groupby(date_col).size()
+    if daily_rollup is not None:
+        cal_data = daily_log_counts(filter_daily_rollup(daily_rollup, df))
+    else:
+        cal_data = df.groupby(date_col).size()
     cal_data.index = pd.to_datetime(cal_data.index)
+    calplot = lr.get_calplot()
     fig,ax = calplot.calplot(cal_data, cmap=cmap, figsize=(8,3))
     return fig,ax
 
@@ -188,6 +145,7 @@ def create_wordcloud(df, notes_col):
     if text.strip() == "":
         st.info("Wordcloud not available because there are not enough notes from your logs to build the visual")
     else:
+        WordCloud = lr.get_wordcloud()
         wordcloud = WordCloud(width=800, height=400, background_color='white',colormap='viridis').generate(text)
         fig,ax = plt.subplots(figsize=(6,4))
         ax.imshow(wordcloud,interpolation='bilinear')
@@ -196,46 +154,22 @@ def create_wordcloud(df, notes_col):
 
 def text_preprocessor(text):
     """Preprocesses text for sentiment analysis"""
-    # tokenize text
-    tokens = word_tokenize(text.lower())
-    # remove stopwords
-    stop_words = set(stopwords.words('english'))
-    filtered_tokens = [token for token in tokens if token not in stop_words]
-    # lemmatize text
-    lemmatizer = WordNetLemmatizer()
-    lemmatized_tokens = [lemmatizer.lemmatize(token) for token in filtered_tokens]
-    # get processed text
-    processed_text = ' '.join(lemmatized_tokens)
-    return processed_text
+    load_nltk_resources()
+    return preprocess_text(text)
 
 # initialize the VADER sentiment analyzer
 @st.cache_resource
 def load_nltk_resources():
-    resources = [
-        ('sentiment/vader_lexicon.zip', 'vader_lexicon'),
-        ('corpora/stopwords', 'stopwords'),
-        ('corpora/wordnet', 'wordnet')
-    ]
-
-    for resource_path, download_name in resources:
-        try:
-            nltk.data.find(resource_path)
-        except (LookupError, ImportError):
-            nltk.download(download_name)
-
+    """Downloads nltk resources on first use and returns the sentiment analyzer"""
+    lr.get_nltk()
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
     return SentimentIntensityAnalyzer()
-sid = load_nltk_resources()
+
 def sentiment_analyzer(text):
     """Analyzes the sentiment of a text"""
     # get sentiment scores
-    scores = sid.polarity_scores(text)['compound']
-    # criteria for sentiment classification
-    if scores >= 0.05:
-        return 'positive'
-    elif scores <= -0.05:
-        return 'negative'
-    else:
-        return 'neutral'
+    scores = load_nltk_resources().polarity_scores(text)['compound']
+    return sentiment_label(scores)
 
 def get_sentiment_results(df, sentiment_col):
     """Gets the percentage of each sentiment"""
@@ -267,8 +201,12 @@ with st.sidebar:
 
         if selected_category == 'All categories':
             overview_df = overview_df01.copy()
+            # per-habit statistics aggregated by the database
+            overview_stats = db.get_habit_stats(start_date, end_date)
         else:
             overview_df = merged_df[merged_df['category'] == selected_category]
+            overview_stats = db.get_habit_stats()
+            overview_stats = overview_stats[overview_stats['category'] == selected_category]
 
     elif st.session_state.active_view == '📈 Activity Analytics':
         # category filters
@@ -314,7 +252,7 @@ if st.session_state.active_view == "📊 Overview":
     with col1:
         with st.container(height=400):
             # average rating per habit visual
-            habit_averages = overview_df.groupby('name')['rating'].mean().round(2).reset_index().sort_values(by='rating',ascending=True)
+            habit_averages = average_rating_by_habit(overview_stats)
             st.subheader("Average rating by activity")
             chart = plot_bar_chart(habit_averages,'name', 'rating', 'Activity', 'Average Rating')
             st.altair_chart(chart, use_container_width=True)
@@ -336,46 +274,18 @@ if st.session_state.active_view == "📊 Overview":
         # completion rate visual
         with st.container(height=400):
             st.subheader("Completion Rate")
-            today = pd.to_datetime(datetime.now().date())
-            consistency_list = []
-            unique_habits = overview_df[['habit_id', 'name', 'frequency', 'start_date']].drop_duplicates()
-            for index,row in unique_habits.iterrows():
-                habit_id = row['habit_id']
-                name = row['name']
-                frequency = row['frequency']
-                start_date = pd.to_datetime(row['start_date'])
-                # actual logs
-                actual_logs = overview_df[overview_df['habit_id'] == habit_id].shape[0]
-                # calculate expected logs based on habit frequency
-                expected_logs = calculate_expected_logs(start_date, frequency)
-                consistency_rate = "%.2f" % ((actual_logs/expected_logs) * 100)
-                consistency_list.append({
-                    "Habit": name,
-                    "Expected Logs": expected_logs,
-                    "Actual Logs":actual_logs,
-                    "Completion Rate(%)": float(consistency_rate)
-                })
-            # convert completion rate list to dataframe
-            consistency_df = pd.DataFrame(consistency_list)
+            consistency_df = calculate_completion_rate(overview_df)
             # dispay dataframe as table
             st.dataframe(consistency_df, hide_index=True)
 
         with st.container(height=400):
             # goal achievement visual
             st.subheader("Goal Achievement")
-            # filter for only tracking types that allow for goal tracking
-            goal_df = overview_df[overview_df['tracking_type'].isin(['Duration (Minutes/hours)', 'Count (Number-based)'])]
-            if goal_df.shape[0] == 0:
+            # only habits that allow for goal tracking have an achievement
+            habit_achievement = goal_achievement_by_habit(overview_stats)
+            if habit_achievement.shape[0] == 0:
                 st.write("This category does not have habits to be displayed for this visual")
             else:
-                # calculate achievement per activity log
-                goal_df['goal_achievement'] = ((goal_df['activity'].astype(float) / goal_df['goal'].astype('float')) * 100).clip(upper=100)
-                # group by habit
-                habit_achievement = (goal_df.groupby('habit_id').agg(
-                    average_goal_achievement = ("goal_achievement", "mean"),
-                    total_logs = ("log_id", 'count'),
-                    habit_name = ("name", 'first')
-                ).reset_index().sort_values(by='average_goal_achievement', ascending=True)).round(2)
                 # plot visual
                 chart = plot_bar_chart(habit_achievement, 'habit_name', 'average_goal_achievement', 'Activity', 'Goal Achievement Rate')
                 st.altair_chart(chart, use_container_width=True)
@@ -392,7 +302,7 @@ if st.session_state.active_view == "📊 Overview":
     # "#239a3b",  # 20-29
     # "#196127"   # 30+
     #     ])
-    fig,ax = plot_calplot(overview_df, 'log_date')
+    fig,ax = plot_calplot(overview_df, 'log_date', daily_rollup=daily_rollup)
     st.pyplot(fig, use_container_width=True)
 elif st.session_state.active_view == "📈 Activity Analytics":
     st.header("Detailed Habit Analysis")
@@ -415,7 +325,7 @@ elif st.session_state.active_view == "📈 Activity Analytics":
             if tracking == "Yes/No (Completed or not)":
                 analytics_df['goal_achievement'] = np.nan
             else:
-                analytics_df['goal_achievement'] = ((analytics_df['activity'].astype(float) / goal.astype(float)) * 100).clip(upper=100)
+                analytics_df['goal_achievement'] = ((analytics_df['value'] / goal.astype(float)) * 100).clip(upper=100)
             # average goal achievement
             avg_goal = analytics_df['goal_achievement'].mean()
             # average rating
@@ -458,7 +368,7 @@ elif st.session_state.active_view == "📈 Activity Analytics":
             st.subheader('Log vs Target')
             if tracking != "Yes/No (Completed or not)":
                 goal = int(goal)
-                chart = plot_line_chart(analytics_df, 'log_date', 'activity', 'Log Date', goal_units,'goal', y_min=0, y_max=goal+10, y_tick_count=5)
+                chart = plot_line_chart(analytics_df, 'log_date', 'value', 'Log Date', goal_units,'goal', y_min=0, y_max=goal+10, y_tick_count=5)
                 st.altair_chart(chart, use_container_width=True)
             else:
                 st.info("This visual is not available for this activity")
@@ -484,7 +394,7 @@ elif st.session_state.active_view == "📈 Activity Analytics":
 
     # log calendar visual
     st.subheader("Log Calendar")
-    fig,ax = plot_calplot(analytics_df, 'log_date', cmap='YlGn_r')
+    fig,ax = plot_calplot(analytics_df, 'log_date', cmap='YlGn_r', daily_rollup=daily_rollup)
     st.pyplot(fig, use_container_width=True)
 
 elif st.session_state.active_view == "🗃️ Data":
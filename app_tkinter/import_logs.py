@@ -0,0 +1,91 @@
+# import modules
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import helper as hp
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import db_operations as db
+from app_streamlit.utils import bulk_import as bi
+
+class LogImporter:
+    def __init__(self, window, main_window=None):
+        self.window = window
+        self.main_window = main_window
+
+        # window properties
+        self.window.title("Import Activity Logs")
+        self.window.geometry("500x400")
+
+        # create scrollable frame
+        self.scroll = hp.ScrollableFrame(self.window)
+        self.scroll.pack(fill="both", expand=True)
+
+        # get frame
+        self.main_frame = self.scroll.get_frame()
+
+        # create widgets
+        self.create_widgets()
+
+    def create_widgets(self):
+        # file format instructions
+        tk.Label(self.main_frame,
+                 text="Select a CSV, Excel or JSON file with the columns habit, log_date, activity and rating.\n"
+                      "Add log_notes to import notes, and category when habits in different categories share a name.",
+                 wraplength=450, justify="left").pack(pady=10)
+        # create import button widget
+        tk.Button(self.main_frame, text="Select File", command=self.import_file).pack()
+        # import results
+        self.result_label = tk.Label(self.main_frame, text="", wraplength=450, justify="left")
+        self.result_label.pack(pady=10)
+        # create back to main window widget
+        tk.Button(self.main_frame, text="Back to Main Window", command=self.back_to_main_window).pack()
+
+    def back_to_main_window(self):
+        """Close current window and show main window"""
+        self.window.destroy()
+        self.main_window.deiconify()
+
+    def import_file(self):
+        """Validate the selected file and import its valid rows"""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Activity Log Files", "*.csv *.xlsx *.xls *.json")],
+            title="Select Activity Log File"
+        )
+        if not file_path:
+            messagebox.showinfo("Cancelled", "Import was cancelled.")
+            return
+
+        try:
+            df = bi.read_activity_file(file_path)
+            valid_df, errors_df = bi.validate_activity_logs(df, db.get_habit_lookup())
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to read file:\n{e}")
+            return
+
+        if valid_df.empty:
+            messagebox.showerror("Error", "No rows in the file can be imported.")
+        elif messagebox.askyesno("Import Activity Logs", f"Import {len(valid_df)} of {len(df)} rows?"):
+            report = bi.import_activity_logs(valid_df, db.insert_activities)
+            inserted = int(report['inserted'].sum())
+            failed = report[report['error'].notna()]
+            if failed.empty:
+                messagebox.showinfo("Success", f"Imported {inserted} activity logs.")
+            else:
+                # list the row ranges of the chunks that were not imported
+                failed_rows = [f"Rows {chunk.first_row}-{chunk.last_row}: {chunk.error}"
+                               for chunk in failed.itertuples(index=False)]
+                messagebox.showwarning("Partial Import",
+                                       "\n".join([f"Imported {inserted} of {len(valid_df)} activity logs.",
+                                                  "Failed rows:"] + failed_rows))
+
+        # list the rejected rows
+        skipped = [f"Row {row}: {error}" for row, error in errors_df.itertuples(index=False)]
+        self.result_label.config(text="\n".join(["Skipped rows:"] + skipped) if skipped else "")
+
+
+# run the window
+if __name__ == "__main__":
+    root = tk.Tk()
+    log_importer = LogImporter(root)
+    root.mainloop()
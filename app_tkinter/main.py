@@ -20,8 +20,10 @@ import subprocess
 
 from habits import Habits  # Importing the Habits class from the habits module
 from db import init_db
+from db.connection import close_connection
 from activity_logs import Activity
 from export_data import DataExporter
+from import_logs import LogImporter
 import helper as hp
 
 class AccountabilityPartner:
@@ -117,6 +119,10 @@ class AccountabilityPartner:
         export_data_btn = tk.Button(main_frame, text = "Download Report", width=25, command=self.open_data_exporter)
         export_data_btn.pack() #display the button in the main frame
 
+        # Import activity logs button
+        import_logs_btn = tk.Button(main_frame, text = "Import Activity Logs", width=25, command=self.open_log_importer)
+        import_logs_btn.pack() #display the button in the main frame
+
     # function to open habits window
     def open_habits(self):
         """
@@ -143,6 +149,12 @@ class AccountabilityPartner:
         exports = tk.Toplevel(root)
         DataExporter(exports, self.root)
 
+    def open_log_importer(self):
+        """Function to open window for activity log imports"""
+        self.root.withdraw()
+        imports = tk.Toplevel(root)
+        LogImporter(imports, self.root)
+
     def open_streamlit(self):
         """Opens Streamlit in browser for data visualization"""
         # script_path = os.path.join(os.path.dirname(__file__), "analytics.py")
@@ -153,4 +165,5 @@ class AccountabilityPartner:
 if __name__ == "__main__":
     root = tk.Tk()  # create the main application window
     app = AccountabilityPartner(root)  # create an instance of the AccountabilityPartner class
-    root.mainloop()  # run the main application loop
\ No newline at end of file
+    root.mainloop()  # run the main application loop
+    close_connection()  # close the db connection once the window is closed
\ No newline at end of file
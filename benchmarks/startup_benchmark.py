@@ -0,0 +1,148 @@
+"""
+Startup Benchmark
+
+Measures how long the Streamlit app takes to start:
+- cold and warm import time for each module that main_app.py imports
+- time until show_home has rendered, using Streamlit's AppTest
+
+Supabase is replaced with a mock so no network calls are made.
+Import times are incremental: a shared dependency is counted against the first module that imports it.
+Cold runs compile bytecode into an empty cache, warm runs reuse it.
+The script exits with status 1 when any median time exceeds its budget.
+
+Usage (from the repository root):
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 5 --budget-scale 1.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, "app_streamlit")
+
+# modules imported by main_app.py
+MODULES = [
+    "app_streamlit.utils.supabase_client",
+    "utils.user_auth",
+    "habit_wizard",
+    "activity_wizard",
+    "todo",
+    "analytics",
+    "import_logs",
+    "app_streamlit.utils.lazy_resources",
+    "app_streamlit.utils.heartbeat",
+]
+
+# budgets in seconds for the warm median of each measurement
+BUDGETS = {
+    "streamlit": 2.0,
+    "app_streamlit.utils.supabase_client": 0.5,
+    "utils.user_auth": 0.5,
+    "habit_wizard": 0.5,
+    "activity_wizard": 0.5,
+    "todo": 0.5,
+    "analytics": 2.0,
+    "import_logs": 0.5,
+    # nltk, wordcloud and calplot load in the background, so these only cost their own code
+    "app_streamlit.utils.lazy_resources": 0.1,
+    "app_streamlit.utils.heartbeat": 0.1,
+    "show_home": 5.0,
+}
+
+# code shared by the measurement subprocesses: mock supabase and set up paths
+SETUP = f"""
+import sys, time, types
+from unittest import mock
+sys.path[:0] = [{APP_DIR!r}, {ROOT!r}]
+fake_supabase = types.ModuleType("supabase")
+fake_supabase.create_client = mock.MagicMock(name="create_client")
+fake_supabase.Client = mock.MagicMock(name="Client")
+sys.modules["supabase"] = fake_supabase
+"""
+
+IMPORT_SCRIPT = SETUP + """
+import importlib, json
+timings = {}
+start = time.perf_counter()
+import streamlit
+timings["streamlit"] = time.perf_counter() - start
+for name in sys.argv[1:]:
+    start = time.perf_counter()
+    importlib.import_module(name)
+    timings[name] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+RENDER_SCRIPT = SETUP + """
+import json
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.secrets["SUPABASE_URL"] = "http://localhost"
+at.secrets["SUPABASE_KEY"] = "benchmark"
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(f"App raised an exception: {at.exception[0].value}")
+if not any(title.value == "Accountability Partner" for title in at.title):
+    raise SystemExit("Home page did not render")
+print(json.dumps({"show_home": elapsed}))
+"""
+
+
+def run_script(script, args, pycache_dir):
+    """Run a measurement script in a fresh interpreter and return its timings"""
+    env = dict(os.environ)
+    env["PYTHONPYCACHEPREFIX"] = pycache_dir
+    # keep the background warm-up thread from skewing the numbers
+    env["WARM_START"] = "false"
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(script, args, runs):
+    """Get the cold timing and warm median timing for each measurement"""
+    with tempfile.TemporaryDirectory() as pycache_dir:
+        cold = run_script(script, args, pycache_dir)
+        warm_runs = [run_script(script, args, pycache_dir) for _ in range(runs)]
+    warm = {name: statistics.median(run[name] for run in warm_runs) for name in cold}
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Streamlit app startup time.")
+    parser.add_argument("--runs", type=int, default=3, help="number of warm runs")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget by this factor")
+    args = parser.parse_args()
+
+    cold, warm = measure(IMPORT_SCRIPT, MODULES, args.runs)
+    render_cold, render_warm = measure(RENDER_SCRIPT, [os.path.join(APP_DIR, "main_app.py")], args.runs)
+    cold.update(render_cold)
+    warm.update(render_warm)
+
+    failures = []
+    print(f"{'measurement':<38}{'cold (s)':>10}{'warm (s)':>10}{'budget (s)':>12}")
+    for name, warm_time in warm.items():
+        budget = BUDGETS.get(name, 1.0) * args.budget_scale
+        flag = ""
+        if warm_time > budget:
+            failures.append(name)
+            flag = "  OVER BUDGET"
+        print(f"{name:<38}{cold[name]:>10.3f}{warm_time:>10.3f}{budget:>12.2f}{flag}")
+
+    if failures:
+        print(f"Startup budget exceeded for: {', '.join(failures)}")
+        sys.exit(1)
+    print("All startup timings are within budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# import sqlite for db connections
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# db name
+db = 'data/accountability.db'
+
+# number of prepared statements sqlite keeps per connection
+STATEMENT_CACHE_SIZE = 256
+
+# one connection per thread
+_local = threading.local()
+
+def get_connection():
+    """Get the connection for the current thread, opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(db, cached_statements=STATEMENT_CACHE_SIZE)
+        # write-ahead logging lets readers and the writer work at the same time
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _local.conn = conn
+    return conn
+
+@contextmanager
+def transaction():
+    """Run queries in a transaction that is committed on success and rolled back on error"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def close_connection():
+    """Close the connection for the current thread"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
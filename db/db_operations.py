@@ -3,95 +3,59 @@ import sqlite3
 from tkinter import messagebox
 import pandas as pd
 import streamlit as st
-
-# db name
-db = 'data/accountability.db'
+from db.connection import get_connection, transaction
 
 # function to save habits
 def insert_habit(name, start_date, frequency, tracking,goal, goal_units, category, notes, end_date):
-    # connect to db
-    conn = sqlite3.connect(db)
-    # create cursor for executing queries
-    cursor = conn.cursor()
-
-    # insert values
-    cursor.execute("""
-            INSERT INTO habits(name, start_date, frequency,category,tracking_type,goal, goal_units, notes, end_date)
-            VALUES (?,?,?,?,?,?,?,?,?)
-    """, (name, start_date, frequency,category, tracking,goal, goal_units, notes, end_date))
-
-    # commit changes
-    conn.commit()
-    conn.close()
+    # insert values in a transaction
+    with transaction() as cursor:
+        cursor.execute("""
+                INSERT INTO habits(name, start_date, frequency,category,tracking_type,goal, goal_units, notes, end_date)
+                VALUES (?,?,?,?,?,?,?,?,?)
+        """, (name, start_date, frequency,category, tracking,goal, goal_units, notes, end_date))
 
 def insert_activity(habit_id,log_date,activity, rating, log_notes):
-    # connect to db
-    conn = sqlite3.connect(db)
-    # create cursor for executing queries
-    cursor = conn.cursor()
-    # insert values
-    cursor.execute("""
-                INSERT INTO activity_logs(habit_id, log_date, activity, rating,log_notes)
-                   VALUES (?,?,?,?,?)
-        """, (habit_id, log_date, activity, rating, log_notes))
-    # commit changes
-    conn.commit()
-    # close connection
-    conn.close()
+    # insert values in a transaction
+    with transaction() as cursor:
+        cursor.execute("""
+                    INSERT INTO activity_logs(habit_id, log_date, activity, rating,log_notes)
+                       VALUES (?,?,?,?,?)
+            """, (habit_id, log_date, activity, rating, log_notes))
 
 def get_categories():
     """Get valid categories from database"""
-    # connect to db
-    conn = sqlite3.connect(db)
-    # create cursor for executing queries
-    cursor = conn.cursor()
     # query to get categories
-    cursor.execute("""
+    cursor = get_connection().execute("""
             SELECT category 
             FROM habits 
             WHERE end_date IS NULL OR end_date > current_timestamp
     """)
     valid_categories = [row[0] for row in cursor.fetchall()]
-    # commit changes
-    conn.commit()
-    conn.close()
     return valid_categories
 
 def get_habits(category):
     """Get habits that fall under a category"""
-    # connect to db
-    conn = sqlite3.connect(db)
-    # create cursor for executing queries
-    cursor = conn.cursor()
-    # query to get categories
-    cursor.execute("""
+    # query to get habits
+    cursor = get_connection().execute("""
             SELECT name, tracking_type
             FROM habits 
             WHERE category = (?) AND (end_date IS NULL OR end_date > current_timestamp)
     """, (category,))
     # store selected habits
     rows = cursor.fetchall()
-    # commit changes and close connection
-    conn.commit()
-    conn.close()
     # dict with habit details
     habit_details = {name: frequency for name,frequency in rows}
     return habit_details
 
 def get_habit_id(habit):
     """Get habit id for a given habit"""
-    # connect to db
-    conn = sqlite3.connect(db)
-    # create cursor for executing categories
-    cursor = conn.cursor()
     # query to get habit_id
-    cursor.execute("""
+    cursor = get_connection().execute("""
         SELECT habit_id
         FROM habits
         WHERE name = (?)
         """, (habit,))
     id = cursor.fetchone()
-    conn.close()
     return id[0]
 
 def safe_db_call(db_function, *args, success_message="Operation Successful", framework='tkinter'):
@@ -125,12 +89,8 @@ def safe_db_call(db_function, *args, success_message="Operation Successful", fra
 
 def get_all_habits_to_df():
     """Get all data for habits"""
-        # connect to db
-    conn = sqlite3.connect(db)
-    # create cursor for executing categories
-    cursor = conn.cursor()
     # query to get all habits data
-    cursor.execute("""
+    cursor = get_connection().execute("""
     SELECT habit_id, name, start_date, frequency, category, tracking_type,goal, goal_units,notes, end_date
     FROM habits
     """)
@@ -140,19 +100,13 @@ def get_all_habits_to_df():
     columns = [description[0] for description in cursor.description]
     # convert to dataframe
     habits_df = pd.DataFrame(rows, columns=columns)
-    # close connection
-    conn.close()
     return habits_df
 
 def get_all_activity_logs():
     """Get all activity logs data"""
-            # connect to db
-    conn = sqlite3.connect(db)
-    # create cursor for executing categories
-    cursor = conn.cursor()
-    # query to get all habits data
-    cursor.execute("""
-    SELECT a.log_id, a.habit_id, h.name, a.log_date, a.activity, a.rating, a.log_notes
+    # query to get all activity logs data
+    cursor = get_connection().execute("""
+    SELECT a.log_id, a.habit_id, h.name, a.log_date, a.activity, a.value, a.completed, a.rating, a.log_notes
     FROM activity_logs a
     JOIN habits h on a.habit_id = h.habit_id
     """)
@@ -162,12 +116,71 @@ def get_all_activity_logs():
     columns = [description[0] for description in cursor.description]
     # convert to dataframe
     activity_df = pd.DataFrame(rows, columns=columns)
-    # close connection
-    conn.close()
+    activity_df['completed'] = activity_df['completed'].astype(bool)
     return activity_df
 
-
-    
-
-
-
+def get_habit_stats(start_date=None, end_date=None):
+    """Get per-habit log counts, average rating, first/last log and goal achievement"""
+    # compare dates without their time of day
+    if start_date is not None:
+        start_date = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    if end_date is not None:
+        end_date = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+    # aggregate in the database, optionally limited to a date range
+    cursor = get_connection().execute("""
+    SELECT h.habit_id, h.name, h.category, h.frequency, h.tracking_type, h.start_date,
+           COUNT(a.log_id) AS total_logs,
+           ROUND(AVG(a.rating), 2) AS average_rating,
+           MIN(a.log_date) AS first_log_date,
+           MAX(a.log_date) AS last_log_date,
+           ROUND(AVG(
+               CASE
+                   WHEN h.tracking_type IN ('Duration (Minutes/hours)', 'Count (Number-based)') AND h.goal > 0
+                   THEN MIN(a.value / h.goal * 100, 100)
+               END
+           ), 2) AS average_goal_achievement
+    FROM habits h
+    JOIN activity_logs a ON a.habit_id = h.habit_id
+    WHERE (:start_date IS NULL OR date(a.log_date) >= :start_date)
+      AND (:end_date IS NULL OR date(a.log_date) <= :end_date)
+    GROUP BY h.habit_id
+    """, {"start_date": start_date, "end_date": end_date})
+    # get rows
+    rows = cursor.fetchall()
+    # get column names
+    columns = [description[0] for description in cursor.description]
+    # convert to dataframe
+    stats_df = pd.DataFrame(rows, columns=columns)
+    return stats_df
+
+def get_daily_rollup():
+    """Get log count, activity sum and rating sum per habit per day"""
+    cursor = get_connection().execute("""
+    SELECT habit_id, log_date, log_count, activity_sum, rating_sum
+    FROM activity_daily_rollup
+    """)
+    # get rows
+    rows = cursor.fetchall()
+    # get column names
+    columns = [description[0] for description in cursor.description]
+    # convert to dataframe
+    rollup_df = pd.DataFrame(rows, columns=columns)
+    rollup_df['log_date'] = pd.to_datetime(rollup_df['log_date'])
+    return rollup_df
+
+def get_habit_lookup():
+    """Get the id, name, category and tracking type of every habit"""
+    # query to get all habits in one lookup
+    cursor = get_connection().execute("""
+        SELECT habit_id, name, category, tracking_type
+        FROM habits
+        """)
+    return pd.DataFrame(cursor.fetchall(), columns=['habit_id', 'name', 'category', 'tracking_type'])
+
+def insert_activities(rows):
+    """Insert many activity logs in one transaction"""
+    with transaction() as cursor:
+        cursor.executemany("""
+                    INSERT INTO activity_logs(habit_id, log_date, activity, rating,log_notes)
+                       VALUES (:habit_id, :log_date, :activity, :rating, :log_notes)
+            """, rows)
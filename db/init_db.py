@@ -1,16 +1,51 @@
 # import sqlite
 import sqlite3
+from db.connection import db
 
-def initialize_database():
-    """
-    Initialize db and create necessary tables
-    """
-    # connect to accountability.db if exists or create if otherwise
-    conn = sqlite3.connect("data/accountability.db")
-    cursor = conn.cursor()
+# value of an activity: Yes is 1, No is 0, numbers are themselves and any other text is NULL
+ACTIVITY_VALUE = """CASE WHEN {col} = 'Yes' THEN 1 WHEN {col} = 'No' THEN 0
+            WHEN {col} <> '' AND {col} NOT GLOB '*[^0-9.]*' AND {col} NOT GLOB '*.*.*'
+                AND {col} NOT GLOB '.*' AND {col} NOT GLOB '*.' THEN CAST({col} AS REAL) END"""
+
+# value an activity adds to the daily rollup, text that is not a number adds 0
+ROLLUP_ACTIVITY_VALUE = "COALESCE(" + ACTIVITY_VALUE + ", 0)"
+
+# typed activity columns generated from the free text activity
+ADD_ACTIVITY_COLUMNS = """
+        ALTER TABLE activity_logs ADD COLUMN value REAL
+            GENERATED ALWAYS AS (""" + ACTIVITY_VALUE.format(col="activity") + """) VIRTUAL;
+        ALTER TABLE activity_logs ADD COLUMN completed INTEGER
+            GENERATED ALWAYS AS (COALESCE(""" + ACTIVITY_VALUE.format(col="activity") + """ > 0, 0)) VIRTUAL;
+"""
+
+# keep the daily rollup up to date as logs are inserted
+CREATE_ROLLUP_TRIGGER = """
+        CREATE TRIGGER IF NOT EXISTS trg_activity_logs_rollup
+        AFTER INSERT ON activity_logs
+        BEGIN
+            INSERT INTO activity_daily_rollup(habit_id, log_date, log_count, activity_sum, rating_sum)
+            VALUES (NEW.habit_id, date(NEW.log_date), 1, """ + ROLLUP_ACTIVITY_VALUE.format(col="NEW.activity") + """, NEW.rating)
+            ON CONFLICT(habit_id, log_date) DO UPDATE SET
+                log_count = log_count + 1,
+                activity_sum = activity_sum + excluded.activity_sum,
+                rating_sum = rating_sum + excluded.rating_sum;
+        END;
+"""
 
-    # create habits table
-    cursor.execute("""
+# rebuild the daily rollup from all activity logs
+REBUILD_ROLLUP = """
+        DELETE FROM activity_daily_rollup;
+        INSERT INTO activity_daily_rollup(habit_id, log_date, log_count, activity_sum, rating_sum)
+        SELECT habit_id, date(log_date), COUNT(*), SUM(""" + ROLLUP_ACTIVITY_VALUE.format(col="activity") + """), SUM(rating)
+        FROM activity_logs
+        GROUP BY habit_id, date(log_date);
+"""
+
+# schema migrations, applied in order
+# PRAGMA user_version stores the number of migrations already applied to a db
+MIGRATIONS = [
+    # 1: create habits and activity logs tables
+    """
         CREATE TABLE IF NOT EXISTS habits(
                    habit_id INTEGER PRIMARY KEY AUTOINCREMENT,
                    name TEXT NOT NULL,
@@ -21,13 +56,10 @@ def initialize_database():
                    goal REAL,
                    goal_units TEXT,
                    notes TEXT,
-                   end_date TEXT, 
+                   end_date TEXT,
                    created_at TEXT NOT NULL DEFAULT current_timestamp
-                   )
-    """)
+                   );
 
-    # create activity logs table
-    cursor.execute("""
         CREATE TABLE IF NOT EXISTS activity_logs(
                    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
                    habit_id INTEGER NOT NULL,
@@ -36,14 +68,95 @@ def initialize_database():
                    rating INTEGER NOT NULL,
                    log_notes TEXT,
                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                   )
-                   """)
+                   );
+    """,
+    # 2: rebuild activity logs with a foreign key to habits
+    """
+        CREATE TABLE activity_logs_new(
+                   log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   habit_id INTEGER NOT NULL REFERENCES habits(habit_id),
+                   log_date TEXT NOT NULL,
+                   activity TEXT NOT NULL,
+                   rating INTEGER NOT NULL,
+                   log_notes TEXT,
+                   created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                   );
+
+        INSERT INTO activity_logs_new(log_id, habit_id, log_date, activity, rating, log_notes, created_at)
+        SELECT log_id, habit_id, log_date, activity, rating, log_notes, created_at
+        FROM activity_logs;
+
+        DROP TABLE activity_logs;
+        ALTER TABLE activity_logs_new RENAME TO activity_logs;
+    """,
+    # 3: indexes for habit lookups and activity log joins
+    """
+        CREATE INDEX IF NOT EXISTS idx_activity_logs_habit_date ON activity_logs(habit_id, log_date);
+        CREATE INDEX IF NOT EXISTS idx_habits_category_end_date ON habits(category, end_date);
+        CREATE INDEX IF NOT EXISTS idx_habits_name ON habits(name);
+    """,
+    # 4: daily rollup of activity logs, kept up to date by a trigger
+    """
+        CREATE TABLE IF NOT EXISTS activity_daily_rollup(
+                   habit_id INTEGER NOT NULL REFERENCES habits(habit_id),
+                   log_date TEXT NOT NULL,
+                   log_count INTEGER NOT NULL DEFAULT 0,
+                   activity_sum REAL NOT NULL DEFAULT 0,
+                   rating_sum INTEGER NOT NULL DEFAULT 0,
+                   PRIMARY KEY (habit_id, log_date)
+                   );
+
+""" + CREATE_ROLLUP_TRIGGER + REBUILD_ROLLUP,
+    # 5: typed activity columns generated from the free text activity
+    ADD_ACTIVITY_COLUMNS,
+]
+
+def get_schema_version(conn):
+    """Get the number of migrations applied to the db"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
-    # create categories table
+def migrate(conn):
+    """Apply any migrations that have not been applied yet"""
+    version = get_schema_version(conn)
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        # run each migration and its version bump in one transaction
+        conn.executescript(f"""
+            BEGIN;
+            {migration}
+            PRAGMA user_version = {number};
+            COMMIT;
+        """)
+    return get_schema_version(conn)
+
+def rebuild_daily_rollup(conn):
+    """Rebuild the daily rollup from all activity logs, e.g. after a backfill"""
+    conn.executescript("BEGIN;" + REBUILD_ROLLUP + "COMMIT;")
+
+def initialize_database():
+    """
+    Initialize db and create necessary tables
+    """
+    # connect to accountability.db if exists or create if otherwise
+    conn = sqlite3.connect(db)
+    try:
+        migrate(conn)
+    except sqlite3.Error:
+        # undo a partially applied migration
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
 
-    conn.commit()
-    conn.close()
 
 
+initialize_database()
 
-initialize_database()
\ No newline at end of file
+# rebuild the daily rollup after a backfill with: python -m db.init_db --rebuild-rollup
+if __name__ == "__main__":
+    import sys
+    if "--rebuild-rollup" in sys.argv:
+        conn = sqlite3.connect(db)
+        rebuild_daily_rollup(conn)
+        conn.close()
+        print("Daily rollup rebuilt.")
@@ -0,0 +1,62 @@
+-- Daily rollup of activity logs per user, habit and day.
+-- Kept up to date by a trigger on activity_logs; call rebuild_activity_daily_rollup after a backfill.
+
+create table if not exists activity_daily_rollup (
+    user_id text not null,
+    habit_id bigint not null,
+    log_date date not null,
+    log_count integer not null default 0,
+    activity_sum numeric not null default 0,
+    rating_sum integer not null default 0,
+    primary key (user_id, habit_id, log_date)
+);
+
+-- value an activity adds to the rollup: Yes counts as 1, No as 0, numbers as themselves
+create or replace function rollup_activity_value(p_activity text)
+returns numeric
+language sql
+immutable
+as $$
+    select case
+        when p_activity = 'Yes' then 1
+        when p_activity ~ '^[0-9]+(\.[0-9]+)?$' then p_activity::numeric
+        else 0
+    end;
+$$;
+
+create or replace function activity_logs_rollup()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into activity_daily_rollup (user_id, habit_id, log_date, log_count, activity_sum, rating_sum)
+    values (new.user_id::text, new.habit_id, new.log_date::date, 1, rollup_activity_value(new.activity::text), new.rating)
+    on conflict (user_id, habit_id, log_date) do update set
+        log_count = activity_daily_rollup.log_count + 1,
+        activity_sum = activity_daily_rollup.activity_sum + excluded.activity_sum,
+        rating_sum = activity_daily_rollup.rating_sum + excluded.rating_sum;
+    return new;
+end;
+$$;
+
+drop trigger if exists trg_activity_logs_rollup on activity_logs;
+create trigger trg_activity_logs_rollup
+after insert on activity_logs
+for each row execute function activity_logs_rollup();
+
+-- rebuild the rollup for one user, or for everyone when p_user_id is null
+create or replace function rebuild_activity_daily_rollup(p_user_id text default null)
+returns void
+language sql
+as $$
+    delete from activity_daily_rollup
+    where p_user_id is null or user_id = p_user_id;
+
+    insert into activity_daily_rollup (user_id, habit_id, log_date, log_count, activity_sum, rating_sum)
+    select user_id::text, habit_id, log_date::date, count(*), sum(rollup_activity_value(activity::text)), sum(rating)
+    from activity_logs
+    where p_user_id is null or user_id::text = p_user_id
+    group by user_id::text, habit_id, log_date::date;
+$$;
+
+select rebuild_activity_daily_rollup();
@@ -0,0 +1,72 @@
+-- Last log date and next due date per habit, so due habits are a single indexed range query.
+-- A habit is due when next_due_date <= today and it has not ended.
+
+alter table habits
+    add column if not exists last_logged_at date,
+    add column if not exists next_due_date date;
+
+-- first day of the period after the last log: the next day, next Monday or first of next month
+-- a habit that has never been logged is due from its start date
+create or replace function habit_next_due_date(p_frequency text, p_last_logged_at date, p_start_date date)
+returns date
+language sql
+immutable
+as $$
+    select case
+        when p_last_logged_at is null then coalesce(p_start_date, date '1970-01-01')
+        when p_frequency = 'Daily' then p_last_logged_at + 1
+        when p_frequency = 'Weekly' then date_trunc('week', p_last_logged_at)::date + 7
+        when p_frequency = 'Monthly' then (date_trunc('month', p_last_logged_at) + interval '1 month')::date
+    end;
+$$;
+
+-- keep next_due_date in step when a habit is created or its schedule changes
+create or replace function habits_next_due_date()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.next_due_date := habit_next_due_date(new.frequency::text, new.last_logged_at, new.start_date::date);
+    return new;
+end;
+$$;
+
+drop trigger if exists trg_habits_next_due_date on habits;
+create trigger trg_habits_next_due_date
+before insert or update of frequency, start_date, last_logged_at on habits
+for each row execute function habits_next_due_date();
+
+-- move the habit's last log date forward when an activity is logged
+create or replace function activity_logs_last_logged()
+returns trigger
+language plpgsql
+as $$
+begin
+    update habits
+    set last_logged_at = new.log_date::date
+    where habit_id = new.habit_id
+        and (last_logged_at is null or last_logged_at < new.log_date::date);
+    return new;
+end;
+$$;
+
+drop trigger if exists trg_activity_logs_last_logged on activity_logs;
+create trigger trg_activity_logs_last_logged
+after insert on activity_logs
+for each row execute function activity_logs_last_logged();
+
+-- backfill from existing logs, the habits trigger sets next_due_date
+update habits h
+set last_logged_at = l.last_logged_at
+from (
+    select habit_id, max(log_date::date) as last_logged_at
+    from activity_logs
+    group by habit_id
+) l
+where l.habit_id = h.habit_id;
+
+update habits
+set next_due_date = habit_next_due_date(frequency::text, last_logged_at, start_date::date)
+where next_due_date is null;
+
+create index if not exists idx_habits_user_next_due_date on habits (user_id, next_due_date);
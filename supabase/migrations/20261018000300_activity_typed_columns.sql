@@ -0,0 +1,23 @@
+-- Typed columns for activity logs, generated from the free text activity.
+-- value: Yes is 1, No is 0 and numeric activities are themselves.
+-- completed: the value is above 0.
+
+alter table activity_logs
+    add column if not exists value numeric
+        generated always as (
+            case
+                when activity::text = 'Yes' then 1
+                when activity::text = 'No' then 0
+                when activity::text ~ '^[0-9]+(\.[0-9]+)?$' then activity::text::numeric
+            end
+        ) stored;
+
+alter table activity_logs
+    add column if not exists completed boolean
+        generated always as (
+            case
+                when activity::text = 'Yes' then true
+                when activity::text ~ '^[0-9]+(\.[0-9]+)?$' then activity::text::numeric > 0
+                else false
+            end
+        ) stored;